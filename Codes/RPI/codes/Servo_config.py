@@ -1,41 +1,64 @@
-from adafruit_pca9685 import PCA9685
-from board import SCL, SDA
-import busio
+from startup import StartupTimer
+from servo_backend import PCA9685Backend
+import sys
 import time
 
-# Initialize I2C and PCA9685
-i2c = busio.I2C(SCL, SDA)
-pca = PCA9685(i2c)
-pca.frequency = 60  # Set frequency to 50Hz for servos
-
 # Servo channels for the 12 servos
 servo_channels = list(range(15))  # Channels 0-16
 
 # Define servo limits
 SERVOMIN = 150  # Minimum pulse length count (from Arduino code)
 SERVOMAX = 600  # Maximum pulse length count (from Arduino code)
+FREQUENCY = 60
+
+# PCA9685 over I2C, counts converted to the backend's pulse widths; the bus opens on first use
+backend = PCA9685Backend(
+    frequency=FREQUENCY,
+    min_pulse=SERVOMIN * 1e6 / (4096 * FREQUENCY),
+    max_pulse=SERVOMAX * 1e6 / (4096 * FREQUENCY),
+)
 
 # Helper function to set servo angle
 def set_servo_angle(channel, angle):
     """
-    Set a servo to a specific angle (0-180 degrees).
-    :param channel: PCA9685 channel (0-11)
+    Move a servo to a specific angle (0-180 degrees), ramped like the robot's homing.
+    :param channel: PCA9685 channel (0-15)
     :param angle: Desired angle (0-180 degrees)
     """
-    pulse = int(SERVOMIN + (angle / 180.0) * (SERVOMAX - SERVOMIN))
-    duty_cycle = int((pulse / 4096.0) * 65536)  # Convert to 16-bit duty cycle
-    pca.channels[channel].duty_cycle = duty_cycle
+    backend.home([channel], [angle])
 
-# Main program to move all 12 servos to 90 degrees
+def calibrate():
+    # Calibration mode: type "<channel> <angle>" to move one servo while fitting horns, empty line to quit
+    while True:
+        line = input("channel angle> ").split()
+        if not line:
+            return
+        try:
+            channel, angle = int(line[0]), float(line[1])
+            set_servo_angle(channel, angle)
+        except (IndexError, ValueError) as e:
+            print(f"Expected '<channel> <angle>': {e}")
+
+# Main program to move all servos to 90 degrees, the same homing path RobotKinematics.setup uses
+# Servo_config.py [--calibrate]
 try:
+    timer = StartupTimer()
+    timer.mark("imports")
+    backend.open()
+    timer.mark("i2c")
+
     print("Setting all servos to 90 degrees...")
-    for channel in servo_channels:
-        set_servo_angle(channel, 90)  # Set to 90 degrees
-        time.sleep(0.1)  # Small delay to allow servo movement
+    steps = backend.home(servo_channels, [90] * len(servo_channels))
+    timer.mark("homing")
 
-    print("All servos are set to 90 degrees.")
-    time.sleep(5)  # Keep the servos in position for 5 seconds
+    print(f"All servos are set to 90 degrees in {steps} steps.")
+    print(timer.report())
+    print(f"Bus usage: {backend.stats()}")
+    if "--calibrate" in sys.argv:
+        calibrate()
+    else:
+        time.sleep(5)  # Keep the servos in position for 5 seconds
 finally:
     # Deinitialize PCA9685 to free up resources
-    pca.deinit()
+    backend.deinit()
     print("Program finished.")
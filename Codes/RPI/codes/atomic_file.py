@@ -0,0 +1,22 @@
+import contextlib
+import os
+
+
+@contextlib.contextmanager
+def atomic_write(path):
+    """Open `path` for binary writing so it only ever holds a complete file.
+
+    Everything goes to `path`.tmp, which replaces `path` once the block
+    exits cleanly. A crash or exception midway leaves the old file (or no
+    file) in place instead of a truncated one, so caches never load half an
+    entry and a robot replaying the file never sees it change under it.
+    """
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            yield f
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, path)
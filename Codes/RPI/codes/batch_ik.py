@@ -0,0 +1,124 @@
+import math
+
+import numpy as np
+
+# Servo orientation per leg, servo = sign * angle + offset (alpha, beta, gamma)
+SERVO_SIGN = np.array([
+    [-1.0, 1.0, 1.0],
+    [1.0, -1.0, -1.0],
+    [1.0, -1.0, -1.0],
+    [-1.0, 1.0, 1.0],
+])
+SERVO_OFFSET = np.array([
+    [90.0, 0.0, 90.0],
+    [90.0, 180.0, 90.0],
+    [90.0, 180.0, 90.0],
+    [90.0, 0.0, 90.0],
+])
+
+SERVO_MIN = 0.0
+SERVO_MAX = 180.0
+CLAMP_TOLERANCE = 1e-6  # Degrees; clipping less than this is rounding of a target on the limit, not a clamp
+
+
+def leg_angles(v, z, length_a, length_b):
+    """Femur (alpha) and knee (beta) angles in radians for a foot v mm out from the femur joint and z mm up.
+
+    The law-of-cosines solution every IK path shares. Floats go through
+    math, which is faster for the few legs of one tick; arrays go through
+    numpy, elementwise. The cosines are clipped, so a target out of reach
+    gets the angles of the leg stretched or folded toward it instead of NaN
+    or an exception. Returns (alpha, beta, reachable), where `reachable` is
+    False wherever that clipping was needed.
+    """
+    a, b = length_a, length_b
+    r2 = v * v + z * z
+    cos_beta = (a * a + b * b - r2) / (2 * a * b)
+    if isinstance(r2, float):
+        r = math.sqrt(r2)
+        cos_alpha = (a * a - b * b + r2) / (2 * a * r) if r else math.copysign(math.inf, a * a - b * b)
+        reachable = -1.0 <= cos_alpha <= 1.0 and -1.0 <= cos_beta <= 1.0
+        if not reachable:
+            cos_alpha = -1.0 if cos_alpha < -1.0 else 1.0 if cos_alpha > 1.0 else cos_alpha
+            cos_beta = -1.0 if cos_beta < -1.0 else 1.0 if cos_beta > 1.0 else cos_beta
+        return math.atan2(z, v) + math.acos(cos_alpha), math.acos(cos_beta), reachable
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_alpha = (a * a - b * b + r2) / (2 * a * np.sqrt(r2))
+    reachable = (np.abs(cos_alpha) <= 1.0) & (np.abs(cos_beta) <= 1.0)
+    alpha = np.arctan2(z, v) + np.arccos(np.clip(cos_alpha, -1.0, 1.0))
+    beta = np.arccos(np.clip(cos_beta, -1.0, 1.0))
+    return alpha, beta, reachable
+
+
+class BatchIK:
+    """Vectorized inverse kinematics for any number of foot positions."""
+
+    def __init__(self, length_a, length_b, length_c):
+        self.length_a = length_a
+        self.length_b = length_b
+        self.length_c = length_c
+        # Radians to servo degrees per leg, for the scalar per-tick path
+        self.servo_scale = (SERVO_SIGN * 180.0 / math.pi).tolist()
+        self.servo_offset = SERVO_OFFSET.tolist()
+
+    def cartesian_to_polar(self, sites):
+        """Convert an (N, 3) array of foot positions to (N, 3) joint angles in degrees."""
+        sites = np.asarray(sites, dtype=np.float64)
+        x, y, z = sites[..., 0], sites[..., 1], sites[..., 2]
+        alpha, beta, _ = leg_angles(np.hypot(x, y) - self.length_c, z, self.length_a, self.length_b)
+        gamma = np.arctan2(y, x)
+
+        return np.degrees(np.stack((alpha, beta, gamma), axis=-1))
+
+    def polar_to_servo(self, polar, legs=None, clamped=None):
+        """Mirror joint angles into servo angles and clamp them to the servo range.
+
+        `legs` selects the orientation row for each input row; by default the
+        rows are taken to be legs 0-3 repeated, so (4, 3) or (T, 4, 3) inputs
+        work without it. If `clamped` (bool, shaped like the result) is given,
+        it's set where a joint had to be clamped.
+        """
+        polar = np.asarray(polar, dtype=np.float64)
+        if legs is None:
+            sign, offset = SERVO_SIGN, SERVO_OFFSET
+        else:
+            sign, offset = SERVO_SIGN[legs], SERVO_OFFSET[legs]
+        return self.clip(sign * polar + offset, clamped)
+
+    def clip(self, servo, clamped=None):
+        # Clamp servo angles to the servo range in place, flagging the joints it moved in `clamped`
+        if clamped is not None:
+            np.less(servo, SERVO_MIN - CLAMP_TOLERANCE, out=clamped)
+            clamped |= servo > SERVO_MAX + CLAMP_TOLERANCE
+        return np.clip(servo, SERVO_MIN, SERVO_MAX, out=servo)
+
+    def solve(self, sites, legs=None):
+        """Foot positions straight to clamped servo angles in one call."""
+        return self.polar_to_servo(self.cartesian_to_polar(sites), legs)
+
+    def solve_into(self, sites, out, clamped=None):
+        """solve() for one (4, 3) pose, or (N, 4, 3) for N robots, into `out`.
+
+        A single pose, what the servo loop solves every tick, is too small for
+        ufunc overhead to pay off, so it goes through solve_tick() instead,
+        which allocates no arrays. `clamped` is as for polar_to_servo().
+        """
+        if sites.ndim == 2:
+            return self.solve_tick(sites, out, clamped)
+        out[...] = self.polar_to_servo(self.cartesian_to_polar(sites), clamped=clamped)
+        return out
+
+    def solve_tick(self, sites, out, clamped=None):
+        # solve_into() for one (4, 3) pose with scalar math; a dozen ufunc calls cost more than 4 legs of trig
+        hypot, atan2 = math.hypot, math.atan2
+        a, b, c = self.length_a, self.length_b, self.length_c
+        values = []
+        for (x, y, z), scale, offset in zip(sites.tolist(), self.servo_scale, self.servo_offset):
+            alpha, beta, _ = leg_angles(hypot(x, y) - c, z, a, b)
+            values += (scale[0] * alpha + offset[0], scale[1] * beta + offset[1], scale[2] * atan2(y, x) + offset[2])
+        out.flat = values
+        if min(values) < SERVO_MIN or max(values) > SERVO_MAX:
+            self.clip(out, clamped)
+        elif clamped is not None:
+            clamped.fill(False)
+        return out
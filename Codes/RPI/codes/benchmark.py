@@ -0,0 +1,619 @@
+import argparse
+import contextlib
+import http.client
+import io
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+import cv2
+import numpy as np
+
+from batch_ik import BatchIK, leg_angles
+from body_pose import BodyPoseController
+from color_detector import ColorDetector
+from frame_sources import SyntheticBlobSource, VideoFileSource
+from target_tracker import TargetTracker
+from vision_pool import ParallelDetector
+from control_loop import FixedRateLoop
+from gait import VelocityGait
+from fleet import sim_fleet
+from gait_compiler import GaitCompiler, GaitTable
+from kinematics import RobotKinematics
+from reachability import ReachabilityMap, reachability_map
+from servo_backend import SimServoBackend
+import main as demo
+import motion_file
+import vision_harness
+
+LENGTH_A = 55.0
+LENGTH_B = 77.5
+LENGTH_C = 27.5
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+THRESHOLD = 0.25  # Relative change that counts as a regression
+
+# Gaits with the arguments main.py uses
+GAIT_ARGS = {
+    "stand": (), "sit": (), "step_forward": (2,), "step_back": (2,), "turn_right": (2,), "turn_left": (2,),
+    "body_left": (15,), "body_right": (15,), "hand_wave": (3,), "hand_shake": (3,), "body_dance": (5,),
+}
+
+# Metric name suffixes and which way is better; anything else is informational
+LOWER_IS_BETTER = ("_us", "_ms", "_overruns")
+HIGHER_IS_BETTER = ("_speedup", "_hz")
+
+
+def scalar_ik(x, y, z, leg):
+    # Reference per-leg implementation: the shared scalar solve, mirrored the way polar_to_servo was before BatchIK
+    alpha, beta, _ = leg_angles(math.hypot(x, y) - LENGTH_C, z, LENGTH_A, LENGTH_B)
+    gamma = math.atan2(y, x)
+    alpha, beta, gamma = math.degrees(alpha), math.degrees(beta), math.degrees(gamma)
+
+    if leg in [1, 2]:
+        alpha, beta, gamma = alpha + 90, 180 - beta, 90 - gamma
+    else:
+        alpha, beta, gamma = 90 - alpha, beta, gamma + 90
+    return min(max(alpha, 0), 180), min(max(beta, 0), 180), min(max(gamma, 0), 180)
+
+
+def random_sites(n, seed=0):
+    # Reachable foot positions around the standing pose
+    rng = np.random.default_rng(seed)
+    sites = np.empty((n, 3))
+    sites[:, 0] = rng.uniform(40.0, 90.0, n)
+    sites[:, 1] = rng.uniform(-20.0, 80.0, n)
+    sites[:, 2] = rng.uniform(-60.0, -20.0, n)
+    return sites
+
+
+def best_of(func, number, repeat=5):
+    # Best per-call time in microseconds
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def bench_ik():
+    ik = BatchIK(LENGTH_A, LENGTH_B, LENGTH_C)
+    tick = random_sites(4)
+    tick_list = tick.tolist()
+    batch = random_sites(10000)
+    batch_list = batch.tolist()
+    batch_legs = np.arange(len(batch)) % 4
+
+    scalar = np.array([scalar_ik(x, y, z, i % 4) for i, (x, y, z) in enumerate(batch_list)])
+    assert np.allclose(scalar, ik.solve(batch, batch_legs)), "BatchIK disagrees with scalar IK"
+    out = np.empty((4, 3))
+    assert np.allclose(ik.solve(tick), ik.solve_into(tick, out)), "solve_into disagrees with solve"
+
+    results = {
+        "tick_scalar_us": best_of(lambda: [scalar_ik(*tick_list[leg], leg) for leg in range(4)], 2000),
+        "tick_batch_us": best_of(lambda: ik.solve(tick), 2000),
+        "tick_into_us": best_of(lambda: ik.solve_into(tick, out), 2000),
+        "batch10k_scalar_us": best_of(
+            lambda: [scalar_ik(x, y, z, i % 4) for i, (x, y, z) in enumerate(batch_list)], 5
+        ),
+        "batch10k_batch_us": best_of(lambda: ik.solve(batch, batch_legs), 20),
+    }
+    # solve_into is what the servo loop calls every tick
+    results["tick_speedup"] = results["tick_scalar_us"] / results["tick_into_us"]
+    results["batch10k_speedup"] = results["batch10k_scalar_us"] / results["batch10k_batch_us"]
+    return results
+
+
+def bench_cartesian_to_polar():
+    # RobotKinematics.cartesian_to_polar per call vs the batched BatchIK call, per pose
+    robot = demo.sim_robot()
+    sites = random_sites(10000)
+    site_list = sites.tolist()
+    return {
+        "call_us": best_of(lambda: robot.cartesian_to_polar(*site_list[0]), 5000),
+        "batch10k_per_pose_us": best_of(lambda: robot.ik.cartesian_to_polar(sites), 20) / len(sites),
+    }
+
+
+def bench_reach():
+    # Reachability checks as set_site does them, and building the grid without the disk cache
+    reach = reachability_map(LENGTH_A, LENGTH_B, LENGTH_C)
+    inside, outside = (62.0, 0.0, -50.0), (32.0, 80.0, 55.0)  # Standing foot, hand_shake's raised foot
+    start = time.perf_counter()
+    ReachabilityMap(LENGTH_A, LENGTH_B, LENGTH_C).build()
+    build_ms = (time.perf_counter() - start) * 1000
+    return {
+        "contains_us": best_of(lambda: reach.contains(0, inside), 20000),
+        "project_us": best_of(lambda: reach.project(2, outside), 20000),
+        "build_ms": build_ms,
+    }
+
+
+def bench_body_pose():
+    # Body pose to foot targets, one pose and a batch, and a servo tick streaming a changing pose
+    robot = demo.sim_robot()
+    with contextlib.redirect_stdout(io.StringIO()):
+        robot.setup()
+        robot.stand()
+    contacts = robot.now.snapshot()
+    poses = np.random.default_rng(0).uniform(-0.2, 0.2, (10000, 6)) * [1, 1, 1, 50, 50, 50]
+    poser = BodyPoseController(robot)
+    poser.start()
+    pose = itertools.cycle(poses.tolist())
+    results = {
+        "solve_us": best_of(lambda: robot.body_ik.solve(poses[0], contacts), 5000),
+        "batch10k_per_pose_us": best_of(lambda: robot.body_ik.solve(poses, contacts), 20) / len(poses),
+        "stream_tick_us": best_of(lambda: (poser.set_pose(*next(pose)), robot.service_tick()), 2000),
+    }
+    poser.finish()
+    return results
+
+
+def bench_service_tick():
+    # One servo_service tick on the simulated board: holding a pose, walking, and replaying a gait table
+    robot = demo.sim_robot()
+    with contextlib.redirect_stdout(io.StringIO()):
+        robot.setup()
+        robot.stand()
+    results = {"hold_us": best_of(robot.service_tick, 2000)}
+
+    gait = VelocityGait(robot, "trot")
+    gait.start()
+    gait.set_command(20.0, 20.0, 0.2)
+    results["velocity_gait_us"] = best_of(robot.service_tick, 2000)
+    gait.finish()
+
+    # Loop a compiled step long enough that playback doesn't run out during timing
+    with tempfile.TemporaryDirectory() as cache_dir:
+        step = GaitCompiler(robot, cache_dir).compile("step_forward", 1)
+    ticks = 2000 * 5 + 1
+    robot.table = GaitTable(np.resize(step.angles, (ticks, 4, 3)), np.resize(step.sites, (ticks, 4, 3)),
+                            step.move_speed)
+    robot.table_index = 0
+    results["table_us"] = best_of(robot.service_tick, 2000)
+    robot.table = None
+    return results
+
+
+def bench_gaits(repeat=3):
+    # Simulated duration and best-of CPU cost of every gait, each started from the standing pose
+    robot = demo.sim_robot()
+    with contextlib.redirect_stdout(io.StringIO()):
+        robot.setup()
+        robot.stand()
+    results = {}
+    for name, args in GAIT_ARGS.items():
+        cpu_times = []
+        for _ in range(repeat):
+            robot.sit() if name == "stand" else robot.stand()
+            start, cpu = robot.clock.now(), time.process_time()
+            getattr(robot, name)(*args)
+            cpu_times.append(time.process_time() - cpu)
+        results[f"{name}_sim_s"] = robot.clock.now() - start
+        results[f"{name}_cpu_ms"] = min(cpu_times) * 1000
+    return results
+
+
+def post_command(port, action):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        conn.request("POST", "/command", json.dumps({"action": action}), {"Content-Type": "application/json"})
+        conn.getresponse().read()
+    finally:
+        conn.close()
+
+
+def bench_command_latency(client_counts=(1, 4, 16), requests=50):
+    # /command round trips against server.py on the simulated board, with concurrent clients
+    os.environ["LEGION_SIM"] = "1"
+    from werkzeug.serving import make_server
+    import server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    http_server = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    port = http_server.server_port
+    with contextlib.redirect_stdout(io.StringIO()):
+        server.robot.setup()  # Nothing is queued yet, so the executor doesn't own the robot
+        server.robot.stand()
+
+        results = {}
+        actions = ("forward", "left", "right", "stop")
+        for clients in client_counts:
+            latencies = []
+            lock = threading.Lock()
+
+            def client(seed):
+                rng = random.Random(seed)
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    post_command(port, rng.choice(actions))
+                    with lock:
+                        latencies.append((time.perf_counter() - start) * 1000)
+
+            threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            post_command(port, "stop")
+
+            latencies = np.array(latencies)
+            results[f"c{clients}_p50_ms"] = float(np.percentile(latencies, 50))
+            results[f"c{clients}_p99_ms"] = float(np.percentile(latencies, 99))
+            results[f"c{clients}_throughput_hz"] = len(latencies) / elapsed
+    http_server.shutdown()
+    return results
+
+
+def legacy_detect(frame):
+    # Reference full-frame detection (ObjectTracker.process_frame before ColorDetector)
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, np.array([0, 100, 100]), np.array([10, 255, 255]))
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if contours:
+        largest_contour = max(contours, key=cv2.contourArea)
+        if cv2.contourArea(largest_contour) > 500:
+            M = cv2.moments(largest_contour)
+            if M["m00"] > 0:
+                return (int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]))
+    return None
+
+
+def recorded_frames(path=None, count=120):
+    # Frames from a video file, or a synthetic 640x480 clip of a red ball drifting over clutter
+    source = VideoFileSource(path, realtime=False) if path else SyntheticBlobSource(count, realtime=False)
+    frames = []
+    while len(frames) < count:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(frame)
+    source.release()
+    return frames
+
+
+def bench_vision():
+    # Color detection throughput on recorded frames (LEGION_FRAMES=video), legacy vs ColorDetector;
+    # the Kalman tracker is compared against the ROI-tracking detector it builds on
+    frames = recorded_frames(os.environ.get("LEGION_FRAMES"))
+    reference = [legacy_detect(frame) for frame in frames]
+
+    def run(detect):
+        positions = []
+        start = time.perf_counter()
+        for frame in frames:
+            positions.append(detect(frame))
+        return len(frames) / (time.perf_counter() - start), positions
+
+    def tracked(level):
+        # Kalman tracker at 30 fps frame times; it predicts through the clip's dropouts
+        tracker = TargetTracker(ColorDetector(level=level))
+        return lambda frame, clock=itertools.count(): tracker.update(frame, next(clock) / 30.0)
+
+    results = {"legacy_fps": max(run(legacy_detect)[0] for _ in range(3))}
+    variants = {
+        "level0": lambda: ColorDetector(level=0, use_roi=False).detect,
+        "level1": lambda: ColorDetector(level=1, use_roi=False).detect,
+        "level1_roi": lambda: ColorDetector(level=1).detect,
+        "level2_roi": lambda: ColorDetector(level=2).detect,
+        "level1_kalman": lambda: tracked(1),
+    }
+    for name, make in variants.items():
+        fps, positions = max((run(make()) for _ in range(3)), key=lambda r: r[0])
+        results[f"{name}_fps"] = fps
+        if name == "level1_kalman":
+            results[f"{name}_vs_roi_speedup"] = fps / results["level1_roi_fps"]
+        else:
+            results[f"{name}_speedup"] = fps / results["legacy_fps"]
+        # Worst disagreement with the reference where it found the target, in pixels; misses count as 1000
+        results[f"{name}_error_px"] = max(
+            math.dist(a, b) if b else 1000.0 for a, b in zip(reference, positions) if a
+        )
+    return results
+
+
+def bench_vision_pool(level=0, rounds=3):
+    # Full-frame detection throughput across worker processes, every frame processed in order
+    frames = recorded_frames(os.environ.get("LEGION_FRAMES"))
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    results = {}
+    for workers in counts:
+        pool = ParallelDetector(workers, level=level)
+        pool.submit(frames[0])
+        pool.results(wait=True)  # Spawn the workers before timing
+        done = 0
+        start = time.perf_counter()
+        for frame in frames * rounds:
+            while not pool.submit(frame):
+                done += len(pool.results(wait=True))
+        while pool.pending:
+            done += len(pool.results(wait=True))
+        results[f"workers{workers}_fps"] = done / (time.perf_counter() - start)
+        pool.close()
+    results["scaling_speedup"] = results[f"workers{counts[-1]}_fps"] / results["workers1_fps"]
+    return results
+
+
+def bench_tracker(frames=240, fps=60.0):
+    # Headless ObjectTracker on a synthetic clip at camera pace: latencies and accuracy against ground truth
+    robot = RobotKinematics(backend=SimServoBackend())
+    with contextlib.redirect_stdout(io.StringIO()):
+        robot.setup()
+        robot.stand()
+        results = vision_harness.run(SyntheticBlobSource(frames, fps=fps), robot=robot)
+    return {name: value for name, value in results.items() if value is not None}
+
+
+def poll_wait(robot, leg):
+    # wait_reach as it was before completion was signalled by servo_service
+    while not all(robot.site_now[leg][i] == robot.site_expect[leg][i] for i in range(3)):
+        time.sleep(0.01)
+
+
+def bench_phase_latency(phases=25):
+    # Delay between the servo tick that finishes a move and the waiter noticing it
+    robot = RobotKinematics(backend=SimServoBackend())
+    robot.move_speed = robot.leg_move_speed
+    z = robot.z_default
+    for leg in range(4):
+        robot.set_site(leg, robot.x_default, robot.y_start, z, duration=0)
+    robot.wait_all_reach()
+
+    results = {}
+    for name in ("poll", "event"):
+        latencies = []
+        for i in range(phases):
+            time.sleep(random.uniform(0.0, 0.02))  # Don't phase-lock with the servo tick
+            handle = robot.set_site(0, robot.KEEP, robot.KEEP, z + 5 * (i % 2 == 0))
+            if name == "poll":
+                poll_wait(robot, 0)
+            else:
+                robot.wait_reach(0)
+            returned_at = time.monotonic()
+            handle.result()
+            latencies.append(max(returned_at - handle.reached_at, 0.0) * 1e6)
+        latencies.sort()
+        results[f"{name}_median_us"] = latencies[len(latencies) // 2]
+        results[f"{name}_max_us"] = latencies[-1]
+    return results
+
+
+def busy_tick(ik, sites, load):
+    # Stand-in for a servo tick: IK plus `load` seconds of other work (I2C, vision contention)
+    ik.solve(sites)
+    end = time.perf_counter() + load
+    while time.perf_counter() < end:
+        pass
+
+
+def bench_control_loop(seconds=1.0, load=0.004):
+    # Effective rate of the old sleep(0.02) loop vs the deadline scheduler
+    ik = BatchIK(LENGTH_A, LENGTH_B, LENGTH_C)
+    sites = random_sites(4)
+
+    ticks = 0
+    start = time.monotonic()
+    while time.monotonic() - start < seconds:
+        busy_tick(ik, sites, load)
+        time.sleep(0.02)
+        ticks += 1
+    results = {"sleep_loop_hz": ticks / (time.monotonic() - start)}
+
+    for rate in (50.0, 100.0):
+        loop = FixedRateLoop(rate)
+        thread = loop.start(lambda: busy_tick(ik, sites, load))
+        time.sleep(seconds)
+        loop.stop()
+        thread.join()
+        stats = loop.stats()
+        name = f"fixed{rate:g}"
+        results[f"{name}_hz"] = 1000.0 / stats["period"]["mean_ms"]
+        results[f"{name}_period_p99_ms"] = stats["period"]["p99_ms"]
+        results[f"{name}_overruns"] = stats["overruns"]
+    return results
+
+
+STARTUP_SCRIPT = """
+import startup
+import json
+from kinematics import RobotKinematics
+from servo_backend import SimServoBackend
+robot = RobotKinematics(backend=SimServoBackend())
+robot.setup()
+robot.stand()
+print(json.dumps(robot.startup.phases))
+"""
+
+
+def bench_startup(runs=3):
+    # Fresh process to standing on the simulated board in real time, per boot phase (best of `runs`)
+    best = None
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        phases = json.loads(output.splitlines()[-1])
+        if best is None or sum(phases.values()) < sum(best.values()):
+            best = phases
+    # Phases in ms without a suffix, so only the total is gated; sub-millisecond phases are all noise
+    results = {name: seconds * 1000 for name, seconds in best.items()}
+    results["total_ms"] = sum(best.values()) * 1000
+    return results
+
+
+def bench_motion_file():
+    # body_dance as a motion file: size per tick, seeks and sequential decode, and replay cost vs compiling
+    robot = demo.sim_robot()
+    with contextlib.redirect_stdout(io.StringIO()):
+        robot.setup()
+        robot.stand()
+    start = robot.now.snapshot()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cpu = time.process_time()
+        table = GaitCompiler(robot, cache_dir).compile("body_dance", 5)
+        compile_ms = (time.process_time() - cpu) * 1000
+        path = os.path.join(cache_dir, "body_dance.lgmr")
+        motion_file.save(path, table.angles, table.sites, robot.control_rate, table.move_speed)
+        motion = motion_file.MotionFile(path)
+        frames = itertools.cycle(np.random.default_rng(0).integers(0, len(motion), 1000).tolist())
+        results = {
+            "bytes_per_tick": (os.path.getsize(path) - motion_file.HEADER.size) / len(motion),
+            "seek_us": best_of(lambda: motion.frame(next(frames)), 5000),
+            "sequential_us": best_of(lambda: [motion.frame(i) for i in range(len(motion))], 20) / len(motion),
+            "compile_cpu_ms": compile_ms,
+        }
+        robot.site_now = start
+        cpu = time.process_time()
+        motion_file.play(robot, path)
+        results["replay_cpu_ms"] = (time.process_time() - cpu) * 1000
+        motion.close()
+    return results
+
+
+def bench_fleet(counts=(1, 2, 4, 8, 16)):
+    # Shared fleet tick vs one service_tick per robot, holding a pose and with every robot trotting
+    single = demo.sim_robot()
+    with contextlib.redirect_stdout(io.StringIO()):
+        single.setup()
+        single.stand()
+    hold = best_of(single.service_tick, 1000)
+    gait = VelocityGait(single, "trot")
+    gait.start()
+    gait.set_command(20.0, 20.0, 0.2)
+    walk = best_of(single.service_tick, 1000)
+    results = {}
+    for count in counts:
+        fleet = sim_fleet(count)
+        with contextlib.redirect_stdout(io.StringIO()):
+            fleet.setup()
+            fleet.each("stand")
+        results[f"hold{count}_tick_us"] = best_of(fleet.tick, max(1000 // count, 50))
+        for robot in fleet:
+            gait = VelocityGait(robot, "trot")
+            gait.start()
+            gait.set_command(20.0, 20.0, 0.2)
+        results[f"walk{count}_tick_us"] = best_of(fleet.tick, max(1000 // count, 50))
+    count = counts[-1]
+    results[f"hold{count}_speedup"] = count * hold / results[f"hold{count}_tick_us"]
+    results[f"walk{count}_speedup"] = count * walk / results[f"walk{count}_tick_us"]
+    return results
+
+
+def bench_demo():
+    # The full main.py demo sequence on the simulated board, in virtual time
+    robot = demo.sim_robot()
+    wall, cpu = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        demo.main(robot)
+    return {
+        "simulated_s": robot.clock.now(),
+        "wall_ms": (time.perf_counter() - wall) * 1000,
+        "cpu_ms": (time.process_time() - cpu) * 1000,
+        "servo_writes": robot.backend.transactions,
+    }
+
+
+# Benchmark groups in run order: name -> (title, function)
+SUITE = {
+    "ik": ("Inverse kinematics", bench_ik),
+    "cartesian_to_polar": ("cartesian_to_polar", bench_cartesian_to_polar),
+    "reach": ("Leg reachability map", bench_reach),
+    "body_pose": ("Body pose IK", bench_body_pose),
+    "service_tick": ("One servo_service tick, simulated board", bench_service_tick),
+    "gaits": ("Gaits from standing, simulated", bench_gaits),
+    "phase_latency": ("Phase transition latency", bench_phase_latency),
+    "control_loop": ("Control loop (4 ms load per tick)", bench_control_loop),
+    "startup": ("Process start to standing, simulated board", bench_startup),
+    "motion_file": ("body_dance as a motion file", bench_motion_file),
+    "fleet": ("Fleet tick vs per-robot ticks, simulated boards", bench_fleet),
+    "demo": ("main.py demo, simulated", bench_demo),
+    "command": ("/command latency, concurrent clients", bench_command_latency),
+    "vision": ("Color detection on recorded frames", bench_vision),
+    "vision_pool": ("Full-frame detection in worker processes", bench_vision_pool),
+    "tracker": ("Headless ObjectTracker on a synthetic clip", bench_tracker),
+}
+
+
+def report(title, results):
+    print(title)
+    for name, value in results.items():
+        print(f"  {name:24s} {value:12.2f}")
+
+
+def direction(name):
+    # +1 if higher is better, -1 if lower is better, 0 if the metric isn't judged.
+    # Single worst-case samples are too noisy to gate on.
+    if "_max_" in name:
+        return 0
+    if name.endswith(HIGHER_IS_BETTER):
+        return 1
+    if name.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(results, baseline, threshold):
+    # Metrics that got worse than the baseline by more than `threshold`, as (name, old, new, change)
+    regressions = []
+    for group, metrics in results.items():
+        for name, new in metrics.items():
+            old = baseline.get(group, {}).get(name)
+            sign = direction(name)
+            if old is None or sign == 0 or old == 0:
+                continue
+            change = (new - old) / abs(old)
+            if -sign * change > threshold:
+                regressions.append((f"{group}.{name}", old, new, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the control stack on the simulated servo board.")
+    parser.add_argument("groups", nargs="*", help=f"groups to run, from {', '.join(SUITE)} (default: all)")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="relative change that fails the run (default: %(default)s)")
+    args = parser.parse_args(argv)
+    unknown = set(args.groups) - set(SUITE)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+
+    results = {}
+    for group in args.groups or SUITE:
+        title, bench = SUITE[group]
+        results[group] = bench()
+        report(title, results[group])
+
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save to record one")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    for name, old, new, change in regressions:
+        print(f"REGRESSION {name}: {old:.2f} -> {new:.2f} ({change:+.0%})")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
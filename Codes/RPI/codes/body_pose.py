@@ -0,0 +1,127 @@
+import numpy as np
+
+from gait import LEG_SX, LEG_SY
+
+# Pose vector layout: roll, pitch, yaw in radians, then x, y, z translation in mm
+NEUTRAL = np.zeros(6)
+
+
+def rotation(roll, pitch, yaw):
+    """(..., 3, 3) body rotation, yaw about z after pitch about x after roll about y.
+
+    In the body frame (x right, y forward, z up) positive roll lowers the
+    right side, positive pitch raises the front and positive yaw turns
+    counterclockwise, matching VelocityGait.
+    """
+    cr, sr = np.cos(roll), np.sin(roll)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    # Rz(yaw) @ Rx(pitch) @ Ry(roll), written out so it broadcasts over any number of poses
+    return np.stack([
+        np.stack([cy * cr - sy * sp * sr, -sy * cp, cy * sr + sy * sp * cr], axis=-1),
+        np.stack([sy * cr + cy * sp * sr, cy * cp, sy * sr - cy * sp * cr], axis=-1),
+        np.stack([-cp * sr, sp, cp * cr], axis=-1),
+    ], axis=-2)
+
+
+class BodyIK:
+    """Foot targets for 6-DoF body poses over fixed foot contacts, any number of poses per call.
+
+    Contacts are given as leg-frame sites (what `site_now` holds) taken at
+    the neutral pose. They are fixed points on the ground; posing the body
+    moves them in the opposite direction in the body frame. The hips sit at
+    the corners of a `length_side` square around the body origin.
+    """
+
+    def __init__(self, length_side):
+        half = length_side / 2
+        self.sign = np.array([[LEG_SX[leg], LEG_SY[leg], 1.0] for leg in range(4)])
+        self.hip = np.array([[LEG_SX[leg] * half, LEG_SY[leg] * half, 0.0] for leg in range(4)])
+
+    def to_body(self, sites):
+        # Leg-frame sites (..., 4, 3) to body-frame points
+        return self.hip + self.sign * sites
+
+    def to_leg(self, points):
+        # Body-frame points (..., 4, 3) to leg-frame sites
+        return self.sign * (points - self.hip)
+
+    def solve(self, poses, contacts):
+        """Leg-frame sites (N, 4, 3) for (N, 6) poses (or (4, 3) for one (6,) pose)."""
+        poses = np.asarray(poses, dtype=np.float64)
+        feet = self.to_body(np.asarray(contacts, dtype=np.float64))
+        rot = rotation(poses[..., 0], poses[..., 1], poses[..., 2])
+        # Body frame is R^T (p - t); on row vectors that's (p - t) @ R
+        moved = (feet - poses[..., None, 3:]) @ rot
+        return self.to_leg(moved)
+
+
+class BodyPoseController:
+    """Holds the feet planted and streams a body pose into them at control rate.
+
+    Runs as a tick hook inside servo_service, like VelocityGait. set_pose()
+    only stores the newest target, so a stabilizer or a look-at loop can send
+    poses at 50-100 Hz without ever blocking. Each tick the pose moves
+    towards the target no faster than `max_speed` mm/s and `max_rate`
+    rad/s, all four feet are solved in one BodyIK call and set_sites retargets
+    them for the next tick.
+    """
+
+    def __init__(self, robot, max_speed=100.0, max_rate=1.5):
+        self.robot = robot
+        self.ik = BodyIK(robot.length_side)
+        self.max_step = np.array([max_rate] * 3 + [max_speed] * 3)  # Per second
+        self.pose = NEUTRAL.copy()
+        self.target = NEUTRAL
+        self.contacts = None
+        self.last_time = None
+        self.applied = False  # Feet already set for the current pose
+        self.running = False
+
+    def start(self, contacts=None):
+        # Plant the feet where they are now (or at `contacts`) and take the current pose as neutral
+        robot = self.robot
+        self.contacts = robot.now.snapshot() if contacts is None else np.array(contacts, dtype=np.float64)
+        self.pose = NEUTRAL.copy()
+        self.target = NEUTRAL
+        self.last_time = None
+        self.applied = False
+        self.running = True
+        if self.tick not in robot.tick_hooks:
+            robot.tick_hooks.append(self.tick)
+
+    def set_pose(self, roll=0.0, pitch=0.0, yaw=0.0, x=0.0, y=0.0, z=0.0):
+        # Newest target wins; the tick reads it with one attribute load, so no lock is needed
+        self.target = np.array([roll, pitch, yaw, x, y, z], dtype=np.float64)
+
+    def settled(self):
+        return np.array_equal(self.pose, self.target)
+
+    def tick(self, now):
+        robot = self.robot
+        dt = robot.loop.period if self.last_time is None else now - self.last_time
+        self.last_time = now
+        if self.applied and self.settled():
+            return  # Holding still; the feet already have their targets
+        step = self.max_step * dt
+        self.pose += np.clip(self.target - self.pose, -step, step)
+        sites = self.ik.solve(self.pose, self.contacts)
+        robot.set_sites(sites, duration=robot.loop.period)
+        self.applied = True
+
+    def restore(self):
+        # Put the feet back on the contacts the pose started from and wait; call after finish()
+        if self.contacts is None:
+            return
+        self.robot.set_sites(self.contacts)
+        self.contacts = None
+        self.robot.wait_all_reach()
+
+    def finish(self):
+        # Stop streaming; the feet stay where the last pose put them
+        robot = self.robot
+        if self.tick in robot.tick_hooks:
+            robot.tick_hooks.remove(self.tick)
+        self.running = False
+        with robot.reach_cond:
+            robot.reach_cond.notify_all()
@@ -0,0 +1,38 @@
+import threading
+import time
+
+
+class RealClock:
+    """Wall-clock time, what the robot runs on."""
+
+    virtual = False
+
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """Simulated time that only moves when something sleeps on it.
+
+    With this clock RobotKinematics doesn't start the servo thread and instead
+    runs control ticks inline whenever a caller waits, so gaits complete as
+    fast as the CPU allows while keeping their real-time tick count.
+    """
+
+    virtual = True
+
+    def __init__(self, start=0.0):
+        self.time = start
+        self.lock = threading.Lock()
+
+    def now(self):
+        return self.time
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            with self.lock:
+                self.time += seconds
@@ -0,0 +1,118 @@
+import cv2
+import numpy as np
+
+
+class ColorDetector:
+    """Finds the largest blob of one HSV color range.
+
+    Frames are shrunk to a pyramid `level` (each level halves the size)
+    before segmentation, and the resized, HSV and mask images live in
+    buffers allocated once and reused. After a hit only a region of
+    interest around the last bounding box is searched; when the target
+    isn't found there the same frame is searched in full.
+    """
+
+    def __init__(self, lower=(0, 100, 100), upper=(10, 255, 255), min_area=500, level=1,
+                 roi_margin=1.0, use_roi=True):
+        self.lower = np.array(lower, dtype=np.uint8)
+        self.upper = np.array(upper, dtype=np.uint8)
+        self.min_area = min_area  # In full-resolution pixels
+        self.level = level
+        self.scale = 1 << level
+        self.roi_margin = roi_margin  # ROI grows by this many box sizes on each side
+        self.use_roi = use_roi
+        self.roi = None  # (x0, y0, x1, y1) in full-resolution pixels, None for a full search
+        self.area = 0.0  # Area of the last detection in full-resolution pixels, 0 if none
+        self.frame_shape = None
+        self.full_searches = 0
+        self.roi_searches = 0
+
+    def allocate(self, shape):
+        # Flat buffers big enough for a full frame at this level; ROIs use a prefix of them
+        height, width = shape[:2]
+        size = (height // self.scale) * (width // self.scale)
+        self.small = np.empty(size * 3, dtype=np.uint8)
+        self.hsv = np.empty(size * 3, dtype=np.uint8)
+        self.mask = np.empty(size, dtype=np.uint8)
+        self.frame_shape = shape
+
+    def views(self, height, width):
+        # Contiguous (height, width) views into the preallocated buffers
+        n = height * width
+        return (self.small[:n * 3].reshape(height, width, 3), self.hsv[:n * 3].reshape(height, width, 3),
+                self.mask[:n].reshape(height, width))
+
+    def search(self, frame, x0, y0, x1, y1):
+        # Largest blob inside frame[y0:y1, x0:x1]: ((cx, cy), (bx0, by0, bx1, by1)) in frame pixels, or None
+        width, height = (x1 - x0) // self.scale, (y1 - y0) // self.scale
+        if width < 1 or height < 1:
+            return None
+        small, hsv, mask = self.views(height, width)
+        region = frame[y0:y1, x0:x1]
+        if self.scale > 1:
+            region = cv2.resize(region, (width, height), dst=small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(region, cv2.COLOR_BGR2HSV, dst=hsv)
+        cv2.inRange(hsv, self.lower, self.upper, dst=mask)
+
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return None
+        largest = max(contours, key=cv2.contourArea)
+        if cv2.contourArea(largest) * self.scale * self.scale <= self.min_area:  # Ignore small objects
+            return None
+        m = cv2.moments(largest)
+        if m["m00"] <= 0:
+            return None
+        s = self.scale
+        # A small pixel covers s full pixels, centered (s - 1) / 2 in
+        cx = int(x0 + m["m10"] / m["m00"] * s + (s - 1) / 2)
+        cy = int(y0 + m["m01"] / m["m00"] * s + (s - 1) / 2)
+        bx, by, bw, bh = cv2.boundingRect(largest)
+        self.area = m["m00"] * s * s
+        return (cx, cy), (x0 + bx * s, y0 + by * s, x0 + (bx + bw) * s, y0 + (by + bh) * s)
+
+    def track_roi(self, box):
+        # Search window for the next frame: the box grown by `roi_margin` on every side
+        height, width = self.frame_shape[:2]
+        bx0, by0, bx1, by1 = box
+        mx = int((bx1 - bx0) * self.roi_margin) + self.scale
+        my = int((by1 - by0) * self.roi_margin) + self.scale
+        self.roi = (max(bx0 - mx, 0), max(by0 - my, 0), min(bx1 + mx, width), min(by1 + my, height))
+
+    def find(self, frame, roi=None):
+        """Largest blob in `roi` (x0, y0, x1, y1), or the whole frame: (position, box) or None."""
+        if frame.shape != self.frame_shape:
+            self.allocate(frame.shape)
+            self.roi = None
+        height, width = frame.shape[:2]
+        if roi is None:
+            found = self.search(frame, 0, 0, width, height)
+        else:
+            # Snapped to the pyramid grid: a region that isn't whole small pixels takes resize's slow path
+            s = self.scale
+            x0, y0 = max(int(roi[0]), 0) // s * s, max(int(roi[1]), 0) // s * s
+            x1, y1 = min(int(roi[2]), width), min(int(roi[3]), height)
+            found = self.search(frame, x0, y0, x1 - (x1 - x0) % s, y1 - (y1 - y0) % s)
+        if found is None:
+            self.area = 0.0
+        return found
+
+    def detect(self, frame):
+        """Center (x, y) of the target in full-resolution pixels, or None."""
+        found = None
+        if self.use_roi and self.roi is not None and frame.shape == self.frame_shape:
+            self.roi_searches += 1
+            found = self.find(frame, self.roi)
+        if found is None:
+            # Target lost (or never locked): look at the whole frame
+            self.full_searches += 1
+            found = self.find(frame)
+        if found is None:
+            self.roi = None
+            return None
+        position, box = found
+        self.track_roi(box)
+        return position
+
+    def reset(self):
+        self.roi = None
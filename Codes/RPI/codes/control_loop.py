@@ -0,0 +1,118 @@
+import threading
+
+from clock import RealClock
+
+MAX_RATE = 100.0  # Hz, the PCA9685 can't usefully take servo updates much faster
+
+
+class TickHistogram:
+    """Fixed-bin histogram of durations, cheap enough to update every tick."""
+
+    def __init__(self, bin_width=0.00025, bins=400):
+        self.bin_width = bin_width
+        self.counts = [0] * (bins + 1)  # Last bin collects everything above the range
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        index = int(seconds / self.bin_width)
+        self.counts[min(max(index, 0), len(self.counts) - 1)] += 1
+        self.total += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        # Upper edge of the bin holding the p-th percentile, in seconds
+        if self.total == 0:
+            return 0.0
+        target = p / 100.0 * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return (index + 1) * self.bin_width
+        return self.max
+
+    def summary(self):
+        # Milliseconds, for printing and JSON
+        return {
+            "count": self.total,
+            "mean_ms": self.sum / self.total * 1000 if self.total else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class FixedRateLoop:
+    """Deadline-based periodic loop.
+
+    Ticks are scheduled on absolute timestamps, so compute time doesn't add to
+    the period and the rate doesn't drift with load. A tick that finishes past
+    its deadline is counted as an overrun and any whole periods it swallowed
+    are skipped instead of being run back to back.
+    """
+
+    def __init__(self, rate=50.0, clock=None):
+        self.clock = clock if clock is not None else RealClock()
+        self.set_rate(rate)
+        self.overruns = 0
+        self.skipped = 0
+        self.period_hist = TickHistogram()
+        self.compute_hist = TickHistogram()
+        self.running = False
+
+    def set_rate(self, rate):
+        if not 0 < rate <= MAX_RATE:
+            raise ValueError(f"Control rate must be in (0, {MAX_RATE:g}] Hz, got {rate}")
+        self.rate = float(rate)
+        self.period = 1.0 / self.rate
+
+    def run(self, tick):
+        # Call `tick()` once per period until stop() is called
+        self.running = True
+        next_tick = self.clock.now()
+        last_start = None
+        while self.running:
+            start = self.clock.now()
+            if last_start is not None:
+                self.period_hist.add(start - last_start)
+            last_start = start
+
+            tick()
+
+            now = self.clock.now()
+            self.compute_hist.add(now - start)
+            next_tick += self.period
+            if now > next_tick:
+                self.overruns += 1
+                missed = int((now - next_tick) / self.period)
+                self.skipped += missed
+                next_tick += missed * self.period
+            else:
+                self.clock.sleep(next_tick - now)
+
+    def step(self, tick):
+        # Run a single tick and advance the clock one period, for inline use in virtual time
+        tick()
+        self.clock.sleep(self.period)
+
+    def start(self, tick):
+        # Run the loop on a daemon thread
+        thread = threading.Thread(target=self.run, args=(tick,), daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.running = False
+
+    def stats(self):
+        return {
+            "rate_hz": self.rate,
+            "overruns": self.overruns,
+            "skipped_ticks": self.skipped,
+            "period": self.period_hist.summary(),
+            "compute": self.compute_hist.summary(),
+        }
@@ -0,0 +1,191 @@
+import sys
+import threading
+import time
+
+import numpy as np
+
+from batch_ik import BatchIK
+from clock import RealClock, VirtualClock
+from control_loop import FixedRateLoop
+from gait import VelocityGait
+from kinematics import RobotKinematics
+from motion_executor import MotionExecutor
+from servo_backend import PCA9685Backend, SimServoBackend
+
+
+class FleetRobot(RobotKinematics):
+    """A RobotKinematics whose control ticks are run by a Fleet instead of its own servo thread."""
+
+    def __init__(self, fleet, backend, control_rate=None):
+        self.fleet = fleet
+        super().__init__(control_rate, backend, fleet.clock)
+
+    def start_service(self):
+        pass  # The fleet's loop runs this robot's ticks
+
+    def step(self):
+        # In virtual time, waiting on one robot moves the whole fleet
+        self.fleet.step()
+
+
+class Fleet:
+    """Several robots, one PCA9685 board each, run by a single fixed-rate control loop.
+
+    Instead of a servo thread per robot, all contending for the bus, one
+    tick advances every robot's trajectories, tick hooks and gait tables,
+    solves IK for all their legs in one BatchIK call, and then sends each
+    board's changed channels back to back in a single pass over the bus.
+    The robots are otherwise ordinary RobotKinematics, so gaits, motions and
+    body poses run on them unchanged, and executor(i) gives each one its
+    own command channel. With a VirtualClock, waiting on any robot runs the
+    whole fleet's ticks inline.
+    """
+
+    def __init__(self, backends, control_rate=None, clock=None):
+        self.clock = clock if clock is not None else RealClock()
+        self.robots = [FleetRobot(self, backend, control_rate) for backend in backends]
+        if not self.robots:
+            raise ValueError("A fleet needs at least one board")
+        first = self.robots[0]
+        self.loop = FixedRateLoop(first.control_rate, self.clock)
+        for robot in self.robots:
+            robot.loop = self.loop
+        # Every robot's legs as one batch; FleetRobots share the RobotKinematics leg lengths
+        self.ik = BatchIK(first.length_a, first.length_b, first.length_c)
+        self.sites = np.zeros((len(self.robots), 4, 3))
+        self.angles = np.zeros((len(self.robots), 4, 3))
+        self.clamped = np.zeros((len(self.robots), 4, 3), dtype=bool)
+        # Boards keep their last sent angles in rows of one array, so a tick finds the robots that moved in one op
+        self.last_angle = np.stack([robot.backend.last_angle for robot in self.robots])
+        for i, robot in enumerate(self.robots):
+            robot.backend.last_angle = self.last_angle[i]
+        self.deadband = np.array([[robot.backend.deadband] for robot in self.robots])
+        self.channels = first.servo_channels
+        self.executors = {}
+        if not self.clock.virtual:
+            threading.Thread(target=self.loop.run, args=(self.tick,), daemon=True).start()
+
+    def __len__(self):
+        return len(self.robots)
+
+    def __getitem__(self, i):
+        return self.robots[i]
+
+    def tick(self):
+        # One control tick for every robot: advance, one IK batch, one bus pass, then completions
+        start = time.perf_counter()
+        played = [robot.advance_tick() for robot in self.robots]
+        for i, robot in enumerate(self.robots):
+            self.sites[i] = robot.site_now
+        self.ik.solve_into(self.sites, self.angles, self.clamped)
+        # Robots with no servo past its deadband would have every channel skipped by the backend anyway
+        moved = ~(np.abs(self.angles.reshape(len(self.robots), -1) - self.last_angle[:, self.channels])
+                  < self.deadband)
+        for i in np.flatnonzero(moved.any(axis=1)):
+            robot = self.robots[i]
+            if played[i] is None and robot.homed:
+                robot.write_servos(self.angles[i])
+        self.bus_pass()
+        for i, robot in enumerate(self.robots):
+            if played[i] is None:
+                robot.finish_tick(start, self.angles[i], self.clamped[i])
+            else:
+                robot.finish_tick(start, played[i])
+
+    def bus_pass(self):
+        # Each board's changed channels as one block write, back to back from the control thread
+        for robot in self.robots:
+            robot.backend.flush()
+
+    def step(self):
+        # Run one fleet tick inline and advance virtual time by a period
+        self.loop.step(self.tick)
+
+    def setup(self):
+        # Boot every robot, homing all boards at once on a real clock, then move their writes into the bus pass
+        if self.clock.virtual:
+            for robot in self.robots:
+                robot.setup()
+        else:
+            threads = [threading.Thread(target=robot.setup) for robot in self.robots]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        for robot in self.robots:
+            robot.backend.deferred = True
+
+    def each(self, name, *args):
+        # Run motion `name` on every robot and wait for all of them; one robot after another in virtual time
+        if self.clock.virtual:
+            for robot in self.robots:
+                getattr(robot, name)(*args)
+            return
+        threads = [threading.Thread(target=getattr(robot, name), args=args) for robot in self.robots]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def executor(self, i):
+        """Command channel of robot i: a MotionExecutor with its own VelocityGait, created on first use."""
+        if self.clock.virtual:
+            raise ValueError("Command channels run motions on their own threads and need a real clock")
+        if i not in self.executors:
+            robot = self.robots[i]
+            self.executors[i] = MotionExecutor(robot, VelocityGait(robot))
+        return self.executors[i]
+
+    def stats(self):
+        bus = [robot.backend.stats() for robot in self.robots]
+        return {
+            "robots": len(self.robots),
+            "loop": self.loop.stats(),
+            "bus_transactions_per_s": sum(board["transactions_per_s"] for board in bus),
+            "bus_bytes_per_s": sum(board["bytes_per_s"] for board in bus),
+        }
+
+    def close(self):
+        # Stop the control loop and switch every board's outputs off
+        self.loop.stop()
+        for robot in self.robots:
+            robot.backend.deinit()
+
+
+def sim_fleet(count, clock=None):
+    # `count` robots on simulated boards, in virtual time unless a clock is given
+    clock = clock if clock is not None else VirtualClock()
+    return Fleet([SimServoBackend(clock) for _ in range(count)], clock=clock)
+
+
+def pca9685_fleet(count, first_address=0x40):
+    # `count` PCA9685 boards at consecutive addresses, all on the Pi's one I2C bus
+    import board
+    import busio
+
+    i2c = busio.I2C(board.SCL, board.SDA)
+    return Fleet([PCA9685Backend(address=first_address + i, i2c=i2c) for i in range(count)])
+
+
+if __name__ == "__main__":
+    # fleet.py [COUNT] [--sim]: stand every robot, walk each one its own way for a few seconds, print the stats
+    argv = [arg for arg in sys.argv[1:] if arg != "--sim"]
+    count = int(argv[0]) if argv else 2
+    fleet = sim_fleet(count, RealClock()) if "--sim" in sys.argv else pca9685_fleet(count)
+    try:
+        fleet.setup()
+        fleet.each("stand")
+        for i in range(count):
+            fleet.executor(i).drive(0.0, 40.0, 0.4 * (i % 3 - 1))
+        time.sleep(3.0)
+        for i in range(count):
+            fleet.executor(i).stop()
+        while not all(executor.idle() for executor in fleet.executors.values()):
+            time.sleep(0.05)
+        stats = fleet.stats()
+        compute = stats["loop"]["compute"]
+        print(f"{count} robots at {stats['loop']['rate_hz']:g} Hz: tick p50 {compute['p50_ms']:.2f} ms, "
+              f"p99 {compute['p99_ms']:.2f} ms, {stats['loop']['overruns']} overruns, "
+              f"{stats['bus_transactions_per_s']:.0f} bus transactions/s, {stats['bus_bytes_per_s']:.0f} B/s")
+    finally:
+        fleet.close()
@@ -0,0 +1,33 @@
+import threading
+
+
+class LatestFrame:
+    """Single-slot frame queue: put() replaces whatever frame is waiting."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.frame = None
+        self.seq = 0  # Frames put so far
+        self.captured_at = 0.0
+        self.closed = False
+
+    def put(self, frame, captured_at):
+        with self.cond:
+            self.frame = frame
+            self.captured_at = captured_at
+            self.seq += 1
+            self.cond.notify_all()
+
+    def close(self):
+        # Wake up readers for good, e.g. when the camera is gone
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def get(self, after=0, timeout=None):
+        # Newest (frame, seq, captured_at) with seq > after, or None on timeout or once closed
+        with self.cond:
+            self.cond.wait_for(lambda: self.seq > after or self.closed, timeout)
+            if self.seq <= after:
+                return None
+            return self.frame, self.seq, self.captured_at
@@ -0,0 +1,137 @@
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    """Base for camera stand-ins with the cv2.VideoCapture read()/release() interface.
+
+    With `realtime` set, read() paces frames at `fps` like a camera would;
+    otherwise frames come as fast as they are asked for. `loop` restarts the
+    sequence at the end instead of reporting end of stream. `truth` holds the
+    ground-truth target position of each frame read, when the source knows
+    it (None where the target isn't visible).
+    """
+
+    def __init__(self, fps=30.0, realtime=True, loop=False):
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+        self.index = 0  # Frames read so far
+        self.truth = []
+        self.next_time = None
+
+    def frame(self, i):
+        # Frame i of the sequence, or None past the end
+        raise NotImplementedError
+
+    def pace(self):
+        if not self.realtime:
+            return
+        now = time.monotonic()
+        if self.next_time is None:
+            self.next_time = now
+        self.next_time += 1.0 / self.fps
+        if self.next_time > now:
+            time.sleep(self.next_time - now)
+
+    def read(self):
+        frame = self.frame(self.index)
+        if frame is None and self.loop and self.index > 0:
+            self.restart()
+            frame = self.frame(self.index)
+        if frame is None:
+            return False, None
+        self.pace()
+        self.index += 1
+        return True, frame
+
+    def restart(self):
+        self.index = 0
+
+    def release(self):
+        pass
+
+
+class VideoFileSource(FrameSource):
+    """Frames from a video file, paced at the file's own frame rate by default."""
+
+    def __init__(self, path, fps=None, realtime=True, loop=False):
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise ValueError(f"Can't open video: {path}")
+        fps = fps or self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(fps, realtime, loop)
+
+    def frame(self, i):
+        ret, frame = self.capture.read()
+        return frame if ret else None
+
+    def restart(self):
+        super().restart()
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def release(self):
+        self.capture.release()
+
+
+class ImageDirSource(FrameSource):
+    """Frames from the images in a directory, in file name order."""
+
+    def __init__(self, path, fps=30.0, realtime=True, loop=False):
+        super().__init__(fps, realtime, loop)
+        self.paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.paths:
+            raise ValueError(f"No images in {path}")
+
+    def frame(self, i):
+        if i >= len(self.paths):
+            return None
+        return cv2.imread(self.paths[i])
+
+
+class SyntheticBlobSource(FrameSource):
+    """A colored ball drifting over a cluttered background, with known positions.
+
+    The ball follows a Lissajous path and is left out for `dropout` frames
+    out of every `dropout_every`, so lost-target handling gets exercised.
+    """
+
+    def __init__(self, frames=300, width=640, height=480, radius=35, color=(20, 20, 220), fps=30.0,
+                 realtime=True, loop=False, dropout=6, dropout_every=40, seed=0):
+        super().__init__(fps, realtime, loop)
+        self.frames = frames
+        self.radius = radius
+        self.color = color
+        self.dropout = dropout
+        self.dropout_every = dropout_every
+        self.width, self.height = width, height
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(0, 120, (height, width, 3), dtype=np.uint8)
+        cv2.rectangle(self.background, (width * 3 // 4, height // 12), (width * 15 // 16, height // 4),
+                      (200, 80, 20), -1)  # Blue and green distractors
+        cv2.circle(self.background, (width // 8, height * 5 // 6), radius * 6 // 7, (30, 180, 40), -1)
+
+    def position(self, i):
+        # Ground truth for frame i, None during dropouts
+        if self.dropout and i % self.dropout_every >= self.dropout_every - self.dropout:
+            return None
+        return (int(self.width / 2 + self.width * 5 / 16 * math.sin(i / 15)),
+                int(self.height / 2 + self.height / 4 * math.cos(i / 23)))
+
+    def frame(self, i):
+        if i >= self.frames:
+            return None
+        frame = self.background.copy()
+        position = self.position(i)
+        if position is not None:
+            cv2.circle(frame, position, self.radius, self.color, -1)
+        self.truth.append(position)
+        return frame
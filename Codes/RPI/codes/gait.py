@@ -0,0 +1,138 @@
+import math
+
+from trajectory import minimum_jerk
+
+# Leg frame to body frame (x right, y forward): legs 0/1 are on the right, 0/2 at the front
+LEG_SX = (1.0, 1.0, -1.0, -1.0)
+LEG_SY = (1.0, -1.0, 1.0, -1.0)
+
+# (phase offset per leg, duty factor)
+GAITS = {
+    "creep": ((0.0, 0.75, 0.5, 0.25), 0.75),  # One leg in the air at a time: 0, 3, 2, 1
+    "trot": ((0.0, 0.5, 0.5, 0.0), 0.5),  # Diagonal pairs 0+3 and 1+2
+}
+
+
+class VelocityGait:
+    """Continuous creep/trot gait driven by a (vx, vy, yaw_rate) command.
+
+    Runs as a tick hook inside servo_service and streams foot setpoints into
+    `set_sites` every tick. Stance feet are integrated against the current
+    command and swing feet aim at a landing point recomputed every tick, so
+    the command can change mid-stride without restarting the cycle. Units are
+    mm/s and rad/s, with x to the right, y forward and yaw counterclockwise.
+    """
+
+    def __init__(self, robot, mode="creep", period=None):
+        if mode not in GAITS:
+            raise ValueError(f"Unknown gait: {mode}")
+        self.robot = robot
+        self.mode = mode
+        self.offsets, self.duty = GAITS[mode]
+        self.period = period if period is not None else (2.0 if mode == "creep" else 1.0)
+        self.command = (0.0, 0.0, 0.0)
+        self.shift = (0.0, 0.0)  # Body offset over the feet in mm, for leaning without stepping
+        self.max_stride = 2 * robot.y_step
+        self.running = False
+        self.stopping = False
+
+        half = robot.length_side / 2
+        self.hip = [(LEG_SX[leg] * half, LEG_SY[leg] * half) for leg in range(4)]
+        neutral = (robot.x_default, robot.y_start + robot.y_step)
+        self.neutral = [self.to_body(leg, *neutral) for leg in range(4)]
+
+    def to_body(self, leg, x, y):
+        hx, hy = self.hip[leg]
+        return hx + LEG_SX[leg] * x, hy + LEG_SY[leg] * y
+
+    def to_leg(self, leg, bx, by):
+        hx, hy = self.hip[leg]
+        return LEG_SX[leg] * (bx - hx), LEG_SY[leg] * (by - hy)
+
+    def set_command(self, vx=0.0, vy=0.0, yaw_rate=0.0):
+        # Clamp so that no foot has to travel more than `max_stride` per stance
+        stance_time = self.duty * self.period
+        worst = max(math.hypot(vx - yaw_rate * ny, vy + yaw_rate * nx) for nx, ny in self.neutral)
+        scale = min(1.0, self.max_stride / (worst * stance_time)) if worst > 0 else 1.0
+        self.command = (vx * scale, vy * scale, yaw_rate * scale)
+
+    def set_shift(self, sx=0.0, sy=0.0):
+        # Move the body by (sx, sy) mm relative to the feet; callers limit the rate
+        self.shift = (sx, sy)
+
+    def start(self):
+        # Take over the feet from wherever they are now
+        robot = self.robot
+        sites = robot.now.snapshot()
+        self.feet = [self.to_body(leg, *sites[leg][:2]) for leg in range(4)]
+        self.liftoff = list(self.feet)
+        self.swinging = [False] * 4
+        self.phase = 0.0
+        self.last_time = None
+        self.stopping = False
+        self.running = True
+        if self.tick not in robot.tick_hooks:
+            robot.tick_hooks.append(self.tick)
+
+    def stop(self, wait=True):
+        # Zero the command and finish the cycle so every foot lands on its neutral point; when waiting,
+        # then step the feet from the neutral points to the stance the scripted gaits start from
+        self.command = (0.0, 0.0, 0.0)
+        self.stopping = True
+        if wait:
+            self.robot.wait_until(lambda: not self.running)
+            self.robot.settle()
+
+    def at_neutral(self, leg):
+        return math.dist(self.feet[leg], self.neutral[leg]) < 0.5
+
+    def landing(self, leg, vx, vy, yaw_rate):
+        # Where a swing foot should touch down so it passes neutral mid-stance
+        nx, ny = self.neutral[leg]
+        half_stance = self.duty * self.period / 2
+        return nx + (vx - yaw_rate * ny) * half_stance, ny + (vy + yaw_rate * nx) * half_stance
+
+    def tick(self, now):
+        robot = self.robot
+        dt = 0.0 if self.last_time is None else now - self.last_time
+        self.last_time = now
+        vx, vy, yaw_rate = self.command
+
+        if self.stopping and not any(self.swinging) and all(self.at_neutral(leg) for leg in range(4)):
+            self.finish()
+            return
+        self.phase = (self.phase + dt / self.period) % 1.0
+
+        sites = []
+        for leg in range(4):
+            p = (self.phase + self.offsets[leg]) % 1.0
+            bx, by = self.feet[leg]
+            settled = self.stopping and not self.swinging[leg] and self.at_neutral(leg)
+            if p < self.duty or settled:
+                self.swinging[leg] = False
+                # Stance: the body moves over the planted foot
+                bx, by = bx - (vx - yaw_rate * by) * dt, by - (vy + yaw_rate * bx) * dt
+                z = robot.z_default
+            else:
+                if not self.swinging[leg]:
+                    self.swinging[leg] = True
+                    self.liftoff[leg] = (bx, by)
+                s = (p - self.duty) / (1.0 - self.duty)
+                lx, ly = self.liftoff[leg]
+                tx, ty = self.landing(leg, vx, vy, yaw_rate)
+                k = minimum_jerk(s)
+                bx, by = lx + (tx - lx) * k, ly + (ty - ly) * k
+                z = robot.z_default + (robot.z_up - robot.z_default) * math.sin(math.pi * s)
+            self.feet[leg] = (bx, by)
+
+            x, y = self.to_leg(leg, bx - self.shift[0], by - self.shift[1])
+            sites.append((x, y, z))
+        robot.set_sites(sites, duration=robot.loop.period)
+
+    def finish(self):
+        robot = self.robot
+        if self.tick in robot.tick_hooks:
+            robot.tick_hooks.remove(self.tick)
+        self.running = False
+        with robot.reach_cond:
+            robot.reach_cond.notify_all()
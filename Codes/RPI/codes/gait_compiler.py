@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from atomic_file import atomic_write
+from batch_ik import SERVO_MAX, SERVO_MIN, SERVO_OFFSET, SERVO_SIGN
+from clock import VirtualClock
+from kinematics import RobotKinematics
+from servo_backend import SimServoBackend
+
+GAITS = ("stand", "sit", "step_forward", "step_back", "turn_right", "turn_left",
+         "body_left", "body_right", "hand_wave", "hand_shake", "body_dance")
+
+# Constants that change the output of a compiled gait
+CONSTANTS = ("length_a", "length_b", "length_c", "length_side", "z_absolute",
+             "z_default", "z_up", "z_boot", "x_default", "x_offset", "y_start", "y_step", "y_default",
+             "speed_multiple", "spot_turn_speed", "leg_move_speed", "body_move_speed", "stand_seat_speed",
+             "base_rate", "control_rate", "profile",
+             "turn_x0", "turn_y0", "turn_x1", "turn_y1")
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gait_cache")
+VERSION = 3  # Bump when a change to the gait code or the motion planning changes what gaits produce
+
+
+class GaitTable:
+    """Dense per-tick servo angles and foot positions for one gait run."""
+
+    def __init__(self, angles, sites, move_speed):
+        self.angles = angles  # (T, 4, 3) servo angles
+        self.sites = sites  # (T, 4, 3) foot positions after each tick
+        self.move_speed = move_speed  # `move_speed` left behind by the gait
+
+    def __len__(self):
+        return len(self.angles)
+
+    def frame(self, i):
+        # (angles, sites) of tick i, what RobotKinematics.play_tick streams
+        return self.angles[i], self.sites[i]
+
+    def save(self, path):
+        with atomic_write(path) as f:
+            np.savez(f, angles=self.angles, sites=self.sites, move_speed=self.move_speed)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["angles"], data["sites"], float(data["move_speed"]))
+
+
+class GaitRecorder:
+    """Runs gait methods on a simulated copy of a robot and records every tick.
+
+    The copy is a plain RobotKinematics on a SimServoBackend and a
+    VirtualClock, with the robot's constants, solvers and speed copied in,
+    so a gait runs through the same trajectories, reach projection and IK
+    as it would live, only as fast as the CPU allows.
+    """
+
+    def __init__(self, robot, site_start):
+        clock = VirtualClock()
+        self.sim = RobotKinematics(robot.control_rate, SimServoBackend(clock), clock)
+        for name in CONSTANTS:
+            setattr(self.sim, name, getattr(robot, name))
+        self.sim.ik, self.sim.reach, self.sim.body_ik = robot.ik, robot.reach, robot.body_ik
+        self.sim.move_speed = robot.move_speed
+        self.sim.site_now = site_start
+        self.sim.site_expect = site_start
+        self.sim.recorder = self
+        self.angles = []
+        self.sites = []
+
+    def add(self, sites, angles):
+        # Called by the copy's servo loop every tick
+        self.sites.append(np.array(sites))
+        self.angles.append(np.array(angles))
+
+    def record(self, gait, *args):
+        # Run `gait(*args)` on the copy and return its ticks as a GaitTable
+        getattr(self.sim, gait)(*args)
+        angles = np.array(self.angles, dtype=np.float64).reshape(-1, 4, 3)
+        sites = np.array(self.sites, dtype=np.float64).reshape(-1, 4, 3)
+        return GaitTable(angles, sites, float(self.sim.move_speed))
+
+
+class GaitCompiler:
+    """Precomputes gaits into servo-angle tables and plays them back on a robot."""
+
+    def __init__(self, robot, cache_dir=CACHE_DIR):
+        self.robot = robot
+        self.cache_dir = cache_dir
+        self.tables = {}
+
+    def key(self, gait, args, site_start):
+        # Hash of everything the table depends on
+        constants = {name: getattr(self.robot, name) for name in CONSTANTS}
+        servos = [SERVO_SIGN.tolist(), SERVO_OFFSET.tolist(), SERVO_MIN, SERVO_MAX]
+        blob = json.dumps([VERSION, gait, list(args), constants, servos, site_start, self.robot.move_speed],
+                          sort_keys=True)
+        return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+    def compile(self, gait, *args, site_start=None):
+        # Return the table for `gait(*args)` started from `site_start`, compiling it if needed
+        if gait not in GAITS:
+            raise ValueError(f"Unknown gait: {gait}")
+        if site_start is None:
+            site_start = self.robot.now.snapshot()
+        site_start = [[float(v) for v in site] for site in site_start]
+
+        key = self.key(gait, args, site_start)
+        if key in self.tables:
+            return self.tables[key]
+
+        path = os.path.join(self.cache_dir, f"{gait}-{key}.npz")
+        if os.path.exists(path):
+            table = GaitTable.load(path)
+        else:
+            table = GaitRecorder(self.robot, site_start).record(gait, *args)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            table.save(path)
+
+        self.tables[key] = table
+        return table
+
+    def run(self, gait, *args):
+        # Compile (or fetch) the gait from the current pose and stream it to the servos
+        self.robot.play(self.compile(gait, *args))
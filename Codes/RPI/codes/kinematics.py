@@ -1,16 +1,43 @@
 import math
 import time
 import threading
-from adafruit_servokit import ServoKit
+
+import numpy as np
+
+from batch_ik import BatchIK
+from body_pose import BodyIK
+from clock import RealClock
+from control_loop import FixedRateLoop
+from leg_state import LegStateStore
+from motion import MotionCancelled, MotionHandle
+from reachability import reachability_map
+from servo_backend import PCA9685Backend
+from startup import StartupTimer
+from telemetry import TelemetryRing
+from trajectory import Trajectory, move_duration
 
 class RobotKinematics:
-    def __init__(self):
+    def __init__(self, control_rate=None, backend=None, clock=None):
+        self.startup = StartupTimer()  # Boot phase timings, reported once the robot stands
+        self.startup.mark("imports")
+        # Time source; with a VirtualClock control ticks run inline instead of on a thread
+        self.clock = clock if clock is not None else RealClock()
         # Initialize the PCA servo driver (16 channels)
-        self.kit = ServoKit(channels=16)
+        self.backend = backend if backend is not None else PCA9685Backend()
         self.setup_constants()
+        if control_rate is not None:
+            self.control_rate = control_rate
+        self.loop = FixedRateLoop(self.control_rate, self.clock)
+        self.telemetry = TelemetryRing()  # Last minute of servo ticks, for /metrics and dumps
         self.setup_servos()
         self.move_speed = 0.0  # Movement speed
-        threading.Thread(target=self.servo_service, daemon=True).start()
+        self.table = None  # Precompiled gait table being played back
+        self.recorder = None  # MotionRecorder capturing every tick, if set
+        self.table_index = 0
+        self.setup_motion()
+        self.startup.mark("init")
+        if not self.clock.virtual:
+            self.start_service()
 
     def setup_constants(self):
         # Robot dimensions and initial configurations
@@ -46,6 +73,14 @@ class RobotKinematics:
         self.body_move_speed = 5.0
         self.stand_seat_speed = 1.0
 
+        # Servo loop rate in Hz (up to 100). Speeds above are per tick at `base_rate`
+        # and get rescaled, so a faster loop gives finer steps at the same mm/s.
+        self.base_rate = 50.0
+        self.control_rate = 50.0
+
+        # Velocity profile of each move: "linear", "trapezoid" or "minjerk"
+        self.profile = "trapezoid"
+
         # Calculations for turning
         temp_a = math.sqrt((2 * self.x_default + self.length_side) ** 2 + self.y_step ** 2)
         temp_b = 2 * (self.y_start + self.y_step) + self.length_side
@@ -57,64 +92,206 @@ class RobotKinematics:
         self.turn_x0 = self.turn_x1 - temp_b * math.cos(temp_alpha)
         self.turn_y0 = temp_b * math.sin(temp_alpha) - self.turn_y1 - self.length_side
 
-        # Arrays for coordinates and movement
-        self.site_now = [[0.0, 0.0, 0.0] for _ in range(4)]
-        self.site_expect = [[0.0, 0.0, 0.0] for _ in range(4)]
-        self.temp_speed = [[0.0, 0.0, 0.0] for _ in range(4)]
+        # Vectorized IK for all legs at once, and body poses to foot targets
+        self.ik = BatchIK(self.length_a, self.length_b, self.length_c)
+        self.body_ik = BodyIK(self.length_side)
+        # Leg workspaces; set_site pulls unreachable targets back inside, so the IK never sees one
+        self.reach = reachability_map(self.length_a, self.length_b, self.length_c)
+
+        # Arrays for coordinates and movement, double buffered so no thread sees half an update
+        self.now = LegStateStore()
+        self.expect = LegStateStore()
+        self.servo_angles = np.zeros((4, 3))  # Reused by every tick's IK
+        self.servo_clamped = np.zeros((4, 3), dtype=bool)  # Joints that tick's IK clipped to the servo range
+        self.trajectory = [None] * 4  # Trajectory each leg is following, None when at rest
+        self.phase_legs = []  # Legs set since the last wait, synchronized to finish together
 
         # Servo pin mappings
         self.servo_pin = [[0, 1, 2], [4, 5, 6], [8, 9, 10], [12, 13, 14]]
+        self.homed = False  # The servo loop leaves the servos alone until setup() has homed them
+        self.booting = False  # Between setup() and the first stand(), which ends the startup report
+
+        # Homing ramp: servos with unknown positions switched on per step, step spacing (s), ramp rate (deg/s)
+        self.home_burst = 4
+        self.home_interval = 0.02
+        self.home_rate = 360.0
+
+    @property
+    def site_now(self):
+        # Current foot positions, (4, 3); read-only view of the published buffer
+        return self.now.front()
+
+    @site_now.setter
+    def site_now(self, sites):
+        self.now.write(sites)
+
+    @property
+    def site_expect(self):
+        # Target foot positions, (4, 3)
+        return self.expect.front()
+
+    @site_expect.setter
+    def site_expect(self, sites):
+        self.expect.write(sites)
+
+    def setup_motion(self):
+        # Motion completion is signalled by servo_service instead of polled
+        self.reach_cond = threading.Condition()
+        self.pending = [[] for _ in range(4)]  # MotionHandles not yet reached, per leg
+        self.tick_hooks = []  # Called as hook(now) at the start of every live tick, e.g. VelocityGait
+        self.cancelled = False  # Set by cancel(), makes every wait raise MotionCancelled until resume()
+        self.projected = 0  # Targets set_site had to move back into reach
 
     def setup_servos(self):
-        # Initialize servos for each leg
-        self.servo = [[self.kit.servo[self.servo_pin[i][j]] for j in range(3)] for i in range(4)]
+        # Backend channel for each servo, in the order BatchIK returns angles
+        self.servo_channels = np.array(self.servo_pin).ravel()
 
     def setup(self):
         # Robot initialization
         print("Robot starts initialization")
-        self.set_site(0, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_boot)
-        self.set_site(1, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_boot)
-        self.set_site(2, self.x_default + self.x_offset, self.y_start, self.z_boot)
-        self.set_site(3, self.x_default + self.x_offset, self.y_start, self.z_boot)
+        # Jump straight to the boot pose, the servos aren't homed yet
+        self.set_sites([
+            (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_boot),
+            (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_boot),
+            (self.x_default + self.x_offset, self.y_start, self.z_boot),
+            (self.x_default + self.x_offset, self.y_start, self.z_boot),
+        ], duration=0)
+        self.wait_all_reach()
+        self.startup.mark("boot_pose")
 
-        for leg in range(4):
-            for axis in range(3):
-                self.site_now[leg][axis] = self.site_expect[leg][axis]
+        self.backend.open()
+        self.startup.mark("i2c")
 
-        # Initialize servos to neutral position
-        for i in range(4):
-            for j in range(3):
-                self.servo[i][j].angle = 90
-                time.sleep(0.1)
+        # Bring all servos to the boot pose together, a few at a time, then hand them to the servo loop
+        angles = self.ik.solve(self.site_now)
+        self.backend.home(self.servo_channels, angles.ravel(), self.home_rate, self.home_burst,
+                          self.home_interval, self.clock)
+        self.homed = True
+        self.booting = True
+        self.startup.mark("homing")
 
         print("Servos initialized")
         print("Robot initialization complete")
 
-    def set_site(self, leg, x, y, z):
-        # Set target position for a leg
-        dx = (x - self.site_now[leg][0]) if x != self.KEEP else 0
-        dy = (y - self.site_now[leg][1]) if y != self.KEEP else 0
-        dz = (z - self.site_now[leg][2]) if z != self.KEEP else 0
-
-        distance = math.sqrt(dx**2 + dy**2 + dz**2)
-        if distance != 0:
-            self.temp_speed[leg][0] = dx / distance * self.move_speed * self.speed_multiple
-            self.temp_speed[leg][1] = dy / distance * self.move_speed * self.speed_multiple
-            self.temp_speed[leg][2] = dz / distance * self.move_speed * self.speed_multiple
-
-        if x != self.KEEP:
-            self.site_expect[leg][0] = x
-        if y != self.KEEP:
-            self.site_expect[leg][1] = y
-        if z != self.KEEP:
-            self.site_expect[leg][2] = z
+    def set_site(self, leg, x, y, z, duration=None):
+        # Set target position for a leg; the move is timed from `move_speed` unless `duration` is given
+        return self.retarget([(leg, (x, y, z))], duration)[0]
+
+    def set_sites(self, sites, duration=None):
+        # Set target positions for all four legs, (4, 3) with KEEP allowed, as one published state
+        return self.retarget(enumerate(sites), duration)
+
+    def retarget(self, targets, duration=None):
+        # Publish new targets for (leg, (x, y, z)) pairs in one `expect` version and start their moves
+        with self.reach_cond:
+            expect = self.expect.begin()
+            moves = []
+            for leg, site in targets:
+                for axis in range(3):
+                    if site[axis] != self.KEEP:
+                        expect[leg][axis] = site[axis]
+                if not self.reach.contains(leg, expect[leg]):
+                    expect[leg] = self.reach.project(leg, expect[leg])
+                    self.projected += 1
+                moves.append((leg, self.site_now[leg].tolist(), expect[leg].tolist()))
+            self.expect.publish()
+
+            # Timed from one tick ago so the next tick already makes progress
+            start_time = self.clock.now() - self.loop.period
+            speed = self.move_speed * self.speed_multiple * self.base_rate  # mm/s
+            handles = []
+            for leg, start, target in moves:
+                move_time = duration if duration is not None else move_duration(start, target, speed)
+                self.trajectory[leg] = Trajectory(start, target, start_time, move_time, self.profile)
+                self.sync_phase(leg)
+
+                handle = MotionHandle(leg)
+                if self.leg_reached(leg):
+                    handle.reach(start)
+                else:
+                    self.pending[leg].append(handle)
+                handles.append(handle)
+        return handles
+
+    def sync_phase(self, leg):
+        # Legs set between two waits form one phase and are stretched to finish together
+        if leg not in self.phase_legs:
+            self.phase_legs.append(leg)
+        moves = [self.trajectory[i] for i in self.phase_legs if self.trajectory[i] is not None]
+        longest = max(move.end_time for move in moves)
+        if math.isinf(longest):
+            return
+        for move in moves:
+            move.retime(longest - move.start_time)
+
+    def leg_reached(self, leg):
+        now, expect = self.now.front()[leg], self.expect.front()[leg]
+        return now[0] == expect[0] and now[1] == expect[1] and now[2] == expect[2]
+
+    def signal_reached(self):
+        # Resolve handles of legs that came to rest and wake up waiters
+        if not any(self.pending):
+            return
+        with self.reach_cond:
+            woke = False
+            for leg in range(4):
+                if self.pending[leg] and self.leg_reached(leg):
+                    site = self.site_now[leg].tolist()
+                    for handle in self.pending[leg]:
+                        handle.reach(site)
+                    self.pending[leg] = []
+                    woke = True
+            if woke:
+                self.reach_cond.notify_all()
+
+    def wait_until(self, predicate):
+        # Block until servo_service makes `predicate()` true, or run the ticks ourselves in virtual time
+        self.phase_legs = []
+        if self.clock.virtual:
+            while not (predicate() or self.cancelled):
+                self.step()
+        else:
+            with self.reach_cond:
+                self.reach_cond.wait_for(lambda: predicate() or self.cancelled)
+        if self.cancelled:
+            raise MotionCancelled()
+
+    def sleep(self, seconds):
+        # Let the robot run for `seconds`; in virtual time the ticks run here
+        if self.clock.virtual:
+            end = self.clock.now() + seconds
+            self.wait_until(lambda: self.clock.now() >= end)
+            return
+        with self.reach_cond:
+            self.reach_cond.wait_for(lambda: self.cancelled, seconds)
+        if self.cancelled:
+            raise MotionCancelled()
+
+    def cancel(self):
+        # Abort the motion in progress: hold the current pose and wake every waiter
+        with self.reach_cond:
+            self.cancelled = True
+            self.table = None
+            hold = self.now.snapshot()
+            self.site_expect = hold
+            now = self.clock.now()
+            for leg in range(4):
+                # Holding trajectories also pull back a tick the servo loop may have published meanwhile
+                self.trajectory[leg] = Trajectory(hold[leg], hold[leg], now, 0.0)
+                # Handles of the aborted moves fail instead of reporting a target that was never reached
+                for handle in self.pending[leg]:
+                    if not handle.cancelled():
+                        handle.set_exception(MotionCancelled())
+                self.pending[leg] = []
+            self.reach_cond.notify_all()
+
+    def resume(self):
+        # Accept motions again after cancel()
+        self.cancelled = False
 
     def wait_reach(self, leg):
         # Wait for a leg to reach its target
-        while True:
-            if all(self.site_now[leg][i] == self.site_expect[leg][i] for i in range(3)):
-                break
-            time.sleep(0.01)
+        self.wait_until(lambda: self.leg_reached(leg))
 
     def wait_all_reach(self):
         # Wait for all legs to reach their targets
@@ -123,65 +300,133 @@ class RobotKinematics:
 
     def cartesian_to_polar(self, x, y, z):
         # Convert Cartesian coordinates to polar angles
-        v = math.sqrt(x**2 + y**2) - self.length_c
-        alpha = math.atan2(z, v) + math.acos(
-            (self.length_a**2 - self.length_b**2 + v**2 + z**2) / (2 * self.length_a * math.sqrt(v**2 + z**2))
-        )
-        beta = math.acos((self.length_a**2 + self.length_b**2 - v**2 - z**2) / (2 * self.length_a * self.length_b))
-        gamma = math.atan2(y, x)
-
-        return math.degrees(alpha), math.degrees(beta), math.degrees(gamma)
+        alpha, beta, gamma = self.ik.cartesian_to_polar((x, y, z))
+        return float(alpha), float(beta), float(gamma)
 
     def polar_to_servo(self, leg, alpha, beta, gamma):
-        # Adjust angles based on servo orientation
-        if leg == 0:
-            alpha = 90 - alpha
-            beta = beta
-            gamma += 90
-        elif leg in [1, 2]:
-            alpha += 90
-            beta = 180 - beta
-            gamma = 90 - gamma
-        elif leg == 3:
-            alpha = 90 - alpha
-            beta = beta
-            gamma += 90
-
-        # Clamp angles to valid servo range
-        self.servo[leg][0].angle = min(max(alpha, 0), 180)
-        self.servo[leg][1].angle = min(max(beta, 0), 180)
-        self.servo[leg][2].angle = min(max(gamma, 0), 180)
+        # Adjust angles based on servo orientation and clamp to valid servo range
+        angles = self.ik.polar_to_servo((alpha, beta, gamma), leg)
+        self.backend.write(self.servo_pin[leg], angles)
+
+    def write_servos(self, angles):
+        # Send a (4, 3) array of servo angles, all changed channels in one transaction
+        self.backend.write(self.servo_channels, np.ravel(angles))
+
+    def update_site(self):
+        # Move `site_now` along each leg's trajectory to where it should be at this tick.
+        # Only the servo loop writes `now`, so this runs without taking `reach_cond`.
+        now = self.clock.now()
+        sites = self.now.begin()
+        for leg in range(4):
+            move = self.trajectory[leg]
+            if move is None or self.leg_reached(leg):
+                continue
+            move.position(now, out=sites[leg])
+        self.now.publish()
+
+    def play_tick(self):
+        # Stream one row of the current gait table (or MotionPlayer), no IK needed; returns the angles written
+        table = self.table
+        if table is None:  # Cancelled since the tick checked
+            return None
+        angles, sites = table.frame(self.table_index)
+        self.write_servos(angles)
+        self.now.write(sites)
+        self.table_index += 1
+        if self.table_index == len(table):
+            with self.reach_cond:
+                self.site_expect = self.site_now
+                self.trajectory = [None] * 4
+                self.move_speed = table.move_speed
+                self.table = None
+                self.reach_cond.notify_all()
+        return angles
+
+    def play(self, table):
+        # Play back a compiled gait table and wait until it finishes
+        if len(table) == 0:
+            return
+        self.table_index = 0
+        self.table = table
+        self.wait_until(lambda: self.table is None)
+
+    def advance_tick(self):
+        # First half of a tick: run the tick hooks and move `site_now`, or stream the gait table.
+        # Returns the angles the table wrote, None if `site_now` still needs IK.
+        if self.table is not None:
+            return self.play_tick()
+        for hook in list(self.tick_hooks):
+            hook(self.clock.now())
+        self.update_site()
+        return None
+
+    def finish_tick(self, start, angles, clamped=None):
+        # Second half: resolve motions that came to rest and record the tick started at `start`
+        self.signal_reached()
+        self.telemetry.record(self.clock.now(), time.perf_counter() - start, self.site_now, angles, clamped)
+        if self.recorder is not None:
+            self.recorder.add(self.site_now, angles)
+
+    def service_tick(self):
+        # One control tick: advance `site_now` (or the gait table) and update the servos
+        start = time.perf_counter()
+        angles = self.advance_tick()
+        clamped = None
+        if angles is None:
+            clamped = self.servo_clamped
+            angles = self.ik.solve_into(self.site_now, self.servo_angles, clamped)
+            if self.homed:
+                self.write_servos(angles)
+        self.finish_tick(start, angles, clamped)
+
+    def step(self):
+        # Run one tick inline and advance virtual time by a period
+        self.loop.step(self.service_tick)
+
+    def start_service(self):
+        # Run the servo loop on its own thread; a Fleet runs it for its robots instead
+        threading.Thread(target=self.servo_service, daemon=True).start()
 
     def servo_service(self):
-        # Update servos based on `site_now`
-        while True:
-            for leg in range(4):
-                for axis in range(3):
-                    if abs(self.site_now[leg][axis] - self.site_expect[leg][axis]) > abs(self.temp_speed[leg][axis]):
-                        self.site_now[leg][axis] += self.temp_speed[leg][axis]
-                    else:
-                        self.site_now[leg][axis] = self.site_expect[leg][axis]
-
-                alpha, beta, gamma = self.cartesian_to_polar(
-                    self.site_now[leg][0], self.site_now[leg][1], self.site_now[leg][2]
-                )
-                self.polar_to_servo(leg, alpha, beta, gamma)
-            time.sleep(0.02)
+        # Update servos based on `site_now` at a fixed rate
+        self.loop.run(self.service_tick)
 
     def stand(self):
         # Stand the robot up
         self.move_speed = self.stand_seat_speed
-        for leg in range(4):
-            self.set_site(leg, self.KEEP, self.KEEP, self.z_default)
+        self.set_sites([(self.KEEP, self.KEEP, self.z_default)] * 4)
         self.wait_all_reach()
+        if self.booting:
+            self.booting = False
+            self.startup.mark("stand")
+            print(self.startup.report())
 
     def sit(self):
         # Sit the robot down
         self.move_speed = self.stand_seat_speed
-        for leg in range(4):
-            self.set_site(leg, self.KEEP, self.KEEP, self.z_boot)
+        self.set_sites([(self.KEEP, self.KEEP, self.z_boot)] * 4)
         self.wait_all_reach()
-        
+
+    def settle(self):
+        # Step any foot left elsewhere (by VelocityGait or a cancelled motion) back to the stance setup()
+        # uses, one leg at a time, so the scripted gaits' `site_now[..][1] == y_start` checks hold again
+        self.move_speed = self.leg_move_speed
+        stance = [
+            (self.x_default - self.x_offset, self.y_start + self.y_step),
+            (self.x_default - self.x_offset, self.y_start + self.y_step),
+            (self.x_default + self.x_offset, self.y_start),
+            (self.x_default + self.x_offset, self.y_start),
+        ]
+        for leg, (x, y) in enumerate(stance):
+            if self.site_now[leg][0] == x and self.site_now[leg][1] == y and self.site_now[leg][2] == self.z_default:
+                continue
+            self.set_site(leg, self.KEEP, self.KEEP, self.z_up)
+            self.wait_all_reach()
+            self.set_site(leg, x, y, self.z_up)
+            self.wait_all_reach()
+            self.set_site(leg, x, y, self.z_default)
+            self.wait_all_reach()
+
     def step_forward(self, steps):
         self.move_speed = self.leg_move_speed
         while steps > 0:
@@ -197,10 +442,12 @@ class RobotKinematics:
 
                 self.move_speed = self.body_move_speed
 
-                self.set_site(0, self.x_default + self.x_offset, self.y_start, self.z_default)
-                self.set_site(1, self.x_default + self.x_offset, self.y_start + 2 * self.y_step, self.z_default)
-                self.set_site(2, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
-                self.set_site(3, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
+                self.set_sites([
+                    (self.x_default + self.x_offset, self.y_start, self.z_default),
+                    (self.x_default + self.x_offset, self.y_start + 2 * self.y_step, self.z_default),
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.move_speed = self.leg_move_speed
@@ -222,10 +469,12 @@ class RobotKinematics:
 
                 self.move_speed = self.body_move_speed
 
-                self.set_site(0, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
-                self.set_site(1, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
-                self.set_site(2, self.x_default + self.x_offset, self.y_start, self.z_default)
-                self.set_site(3, self.x_default + self.x_offset, self.y_start + 2 * self.y_step, self.z_default)
+                self.set_sites([
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                    (self.x_default + self.x_offset, self.y_start, self.z_default),
+                    (self.x_default + self.x_offset, self.y_start + 2 * self.y_step, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.move_speed = self.leg_move_speed
@@ -255,10 +504,12 @@ class RobotKinematics:
                 self.move_speed = self.body_move_speed
 
                 # Adjust body
-                self.set_site(0, self.x_default + self.x_offset, self.y_start + 2 * self.y_step, self.z_default)
-                self.set_site(1, self.x_default + self.x_offset, self.y_start, self.z_default)
-                self.set_site(2, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
-                self.set_site(3, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
+                self.set_sites([
+                    (self.x_default + self.x_offset, self.y_start + 2 * self.y_step, self.z_default),
+                    (self.x_default + self.x_offset, self.y_start, self.z_default),
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.move_speed = self.leg_move_speed
@@ -281,10 +532,12 @@ class RobotKinematics:
                 self.move_speed = self.body_move_speed
 
                 # Adjust body
-                self.set_site(0, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
-                self.set_site(1, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
-                self.set_site(2, self.x_default + self.x_offset, self.y_start + 2 * self.y_step, self.z_default)
-                self.set_site(3, self.x_default + self.x_offset, self.y_start, self.z_default)
+                self.set_sites([
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                    (self.x_default + self.x_offset, self.y_start + 2 * self.y_step, self.z_default),
+                    (self.x_default + self.x_offset, self.y_start, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.move_speed = self.leg_move_speed
@@ -306,28 +559,34 @@ class RobotKinematics:
                 self.set_site(2, self.x_default + self.x_offset, self.y_start, self.z_up)  # Lift leg 2
                 self.wait_all_reach()
 
-                self.set_site(0, self.turn_x0 - self.x_offset, self.turn_y0, self.z_default)  # Adjust body
-                self.set_site(1, self.turn_x1 - self.x_offset, self.turn_y1, self.z_default)
-                self.set_site(2, self.turn_x0 + self.x_offset, self.turn_y0, self.z_up)  # Move leg 2
-                self.set_site(3, self.turn_x1 + self.x_offset, self.turn_y1, self.z_default)
+                self.set_sites([
+                    (self.turn_x0 - self.x_offset, self.turn_y0, self.z_default),  # Adjust body
+                    (self.turn_x1 - self.x_offset, self.turn_y1, self.z_default),
+                    (self.turn_x0 + self.x_offset, self.turn_y0, self.z_up),  # Move leg 2
+                    (self.turn_x1 + self.x_offset, self.turn_y1, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.set_site(2, self.turn_x0 + self.x_offset, self.turn_y0, self.z_default)  # Place leg 2 down
                 self.wait_all_reach()
 
-                self.set_site(0, self.turn_x0 + self.x_offset, self.turn_y0, self.z_default)  # Adjust body again
-                self.set_site(1, self.turn_x1 + self.x_offset, self.turn_y1, self.z_default)
-                self.set_site(2, self.turn_x0 - self.x_offset, self.turn_y0, self.z_default)
-                self.set_site(3, self.turn_x1 - self.x_offset, self.turn_y1, self.z_default)
+                self.set_sites([
+                    (self.turn_x0 + self.x_offset, self.turn_y0, self.z_default),  # Adjust body again
+                    (self.turn_x1 + self.x_offset, self.turn_y1, self.z_default),
+                    (self.turn_x0 - self.x_offset, self.turn_y0, self.z_default),
+                    (self.turn_x1 - self.x_offset, self.turn_y1, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.set_site(0, self.turn_x0 + self.x_offset, self.turn_y0, self.z_up)  # Lift leg 0
                 self.wait_all_reach()
 
-                self.set_site(0, self.x_default + self.x_offset, self.y_start, self.z_up)  # Move leg 0 back
-                self.set_site(1, self.x_default + self.x_offset, self.y_start, self.z_default)
-                self.set_site(2, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
-                self.set_site(3, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
+                self.set_sites([
+                    (self.x_default + self.x_offset, self.y_start, self.z_up),  # Move leg 0 back
+                    (self.x_default + self.x_offset, self.y_start, self.z_default),
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.set_site(0, self.x_default + self.x_offset, self.y_start, self.z_default)  # Place leg 0 down
@@ -337,28 +596,34 @@ class RobotKinematics:
                 self.set_site(1, self.x_default + self.x_offset, self.y_start, self.z_up)  # Lift leg 1
                 self.wait_all_reach()
 
-                self.set_site(0, self.turn_x1 + self.x_offset, self.turn_y1, self.z_default)  # Adjust body
-                self.set_site(1, self.turn_x0 + self.x_offset, self.turn_y0, self.z_up)  # Move leg 1
-                self.set_site(2, self.turn_x1 - self.x_offset, self.turn_y1, self.z_default)
-                self.set_site(3, self.turn_x0 - self.x_offset, self.turn_y0, self.z_default)
+                self.set_sites([
+                    (self.turn_x1 + self.x_offset, self.turn_y1, self.z_default),  # Adjust body
+                    (self.turn_x0 + self.x_offset, self.turn_y0, self.z_up),  # Move leg 1
+                    (self.turn_x1 - self.x_offset, self.turn_y1, self.z_default),
+                    (self.turn_x0 - self.x_offset, self.turn_y0, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.set_site(1, self.turn_x0 + self.x_offset, self.turn_y0, self.z_default)  # Place leg 1 down
                 self.wait_all_reach()
 
-                self.set_site(0, self.turn_x1 - self.x_offset, self.turn_y1, self.z_default)  # Adjust body again
-                self.set_site(1, self.turn_x0 - self.x_offset, self.turn_y0, self.z_default)
-                self.set_site(2, self.turn_x1 + self.x_offset, self.turn_y1, self.z_default)
-                self.set_site(3, self.turn_x0 + self.x_offset, self.turn_y0, self.z_default)
+                self.set_sites([
+                    (self.turn_x1 - self.x_offset, self.turn_y1, self.z_default),  # Adjust body again
+                    (self.turn_x0 - self.x_offset, self.turn_y0, self.z_default),
+                    (self.turn_x1 + self.x_offset, self.turn_y1, self.z_default),
+                    (self.turn_x0 + self.x_offset, self.turn_y0, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.set_site(3, self.turn_x0 + self.x_offset, self.turn_y0, self.z_up)  # Lift leg 3
                 self.wait_all_reach()
 
-                self.set_site(0, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)  # Adjust body
-                self.set_site(1, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
-                self.set_site(2, self.x_default + self.x_offset, self.y_start, self.z_default)
-                self.set_site(3, self.x_default + self.x_offset, self.y_start, self.z_up)  # Move leg 3 back
+                self.set_sites([
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),  # Adjust body
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                    (self.x_default + self.x_offset, self.y_start, self.z_default),
+                    (self.x_default + self.x_offset, self.y_start, self.z_up),  # Move leg 3 back
+                ])
                 self.wait_all_reach()
 
                 self.set_site(3, self.x_default + self.x_offset, self.y_start, self.z_default)  # Place leg 3 down
@@ -373,28 +638,34 @@ class RobotKinematics:
                 self.set_site(3, self.x_default + self.x_offset, self.y_start, self.z_up)  # Lift leg 3
                 self.wait_all_reach()
 
-                self.set_site(0, self.turn_x1 - self.x_offset, self.turn_y1, self.z_default)  # Adjust body
-                self.set_site(1, self.turn_x0 - self.x_offset, self.turn_y0, self.z_default)
-                self.set_site(2, self.turn_x1 + self.x_offset, self.turn_y1, self.z_default)
-                self.set_site(3, self.turn_x0 + self.x_offset, self.turn_y0, self.z_up)  # Move leg 3
+                self.set_sites([
+                    (self.turn_x1 - self.x_offset, self.turn_y1, self.z_default),  # Adjust body
+                    (self.turn_x0 - self.x_offset, self.turn_y0, self.z_default),
+                    (self.turn_x1 + self.x_offset, self.turn_y1, self.z_default),
+                    (self.turn_x0 + self.x_offset, self.turn_y0, self.z_up),  # Move leg 3
+                ])
                 self.wait_all_reach()
 
                 self.set_site(3, self.turn_x0 + self.x_offset, self.turn_y0, self.z_default)  # Place leg 3 down
                 self.wait_all_reach()
 
-                self.set_site(0, self.turn_x1 + self.x_offset, self.turn_y1, self.z_default)  # Adjust body again
-                self.set_site(1, self.turn_x0 + self.x_offset, self.turn_y0, self.z_default)
-                self.set_site(2, self.turn_x1 - self.x_offset, self.turn_y1, self.z_default)
-                self.set_site(3, self.turn_x0 - self.x_offset, self.turn_y0, self.z_default)
+                self.set_sites([
+                    (self.turn_x1 + self.x_offset, self.turn_y1, self.z_default),  # Adjust body again
+                    (self.turn_x0 + self.x_offset, self.turn_y0, self.z_default),
+                    (self.turn_x1 - self.x_offset, self.turn_y1, self.z_default),
+                    (self.turn_x0 - self.x_offset, self.turn_y0, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.set_site(1, self.turn_x0 + self.x_offset, self.turn_y0, self.z_up)  # Lift leg 1
                 self.wait_all_reach()
 
-                self.set_site(0, self.x_default + self.x_offset, self.y_start, self.z_default)  # Adjust body
-                self.set_site(1, self.x_default + self.x_offset, self.y_start, self.z_up)  # Move leg 1
-                self.set_site(2, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
-                self.set_site(3, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
+                self.set_sites([
+                    (self.x_default + self.x_offset, self.y_start, self.z_default),  # Adjust body
+                    (self.x_default + self.x_offset, self.y_start, self.z_up),  # Move leg 1
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.set_site(1, self.x_default + self.x_offset, self.y_start, self.z_default)  # Place leg 1 down
@@ -404,46 +675,50 @@ class RobotKinematics:
                 self.set_site(0, self.x_default + self.x_offset, self.y_start, self.z_up)  # Lift leg 0
                 self.wait_all_reach()
 
-                self.set_site(0, self.turn_x0 + self.x_offset, self.turn_y0, self.z_up)  # Move leg 0
-                self.set_site(1, self.turn_x1 + self.x_offset, self.turn_y1, self.z_default)
-                self.set_site(2, self.turn_x0 - self.x_offset, self.turn_y0, self.z_default)
-                self.set_site(3, self.turn_x1 - self.x_offset, self.turn_y1, self.z_default)
+                self.set_sites([
+                    (self.turn_x0 + self.x_offset, self.turn_y0, self.z_up),  # Move leg 0
+                    (self.turn_x1 + self.x_offset, self.turn_y1, self.z_default),
+                    (self.turn_x0 - self.x_offset, self.turn_y0, self.z_default),
+                    (self.turn_x1 - self.x_offset, self.turn_y1, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.set_site(0, self.turn_x0 + self.x_offset, self.turn_y0, self.z_default)  # Place leg 0 down
                 self.wait_all_reach()
 
-                self.set_site(0, self.turn_x0 - self.x_offset, self.turn_y0, self.z_default)  # Adjust body
-                self.set_site(1, self.turn_x1 - self.x_offset, self.turn_y1, self.z_default)
-                self.set_site(2, self.turn_x0 + self.x_offset, self.turn_y0, self.z_default)
-                self.set_site(3, self.turn_x1 + self.x_offset, self.turn_y1, self.z_default)
+                self.set_sites([
+                    (self.turn_x0 - self.x_offset, self.turn_y0, self.z_default),  # Adjust body
+                    (self.turn_x1 - self.x_offset, self.turn_y1, self.z_default),
+                    (self.turn_x0 + self.x_offset, self.turn_y0, self.z_default),
+                    (self.turn_x1 + self.x_offset, self.turn_y1, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.set_site(2, self.turn_x0 + self.x_offset, self.turn_y0, self.z_up)  # Lift leg 2
                 self.wait_all_reach()
 
-                self.set_site(0, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)  # Adjust body
-                self.set_site(1, self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default)
-                self.set_site(2, self.x_default + self.x_offset, self.y_start, self.z_up)  # Move leg 2
-                self.set_site(3, self.x_default + self.x_offset, self.y_start, self.z_default)
+                self.set_sites([
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),  # Adjust body
+                    (self.x_default - self.x_offset, self.y_start + self.y_step, self.z_default),
+                    (self.x_default + self.x_offset, self.y_start, self.z_up),  # Move leg 2
+                    (self.x_default + self.x_offset, self.y_start, self.z_default),
+                ])
                 self.wait_all_reach()
 
                 self.set_site(2, self.x_default + self.x_offset, self.y_start, self.z_default)  # Place leg 2 down
                 self.wait_all_reach()
 
-    def body_left(self, i):
-        self.set_site(0, self.site_now[0][0] + i, self.KEEP, self.KEEP)
-        self.set_site(1, self.site_now[1][0] + i, self.KEEP, self.KEEP)
-        self.set_site(2, self.site_now[2][0] - i, self.KEEP, self.KEEP)
-        self.set_site(3, self.site_now[3][0] - i, self.KEEP, self.KEEP)
+    def move_body(self, roll=0.0, pitch=0.0, yaw=0.0, x=0.0, y=0.0, z=0.0):
+        # Move the body by a 6-DoF offset (radians, mm) over the planted feet and wait until it's there
+        sites = self.body_ik.solve((roll, pitch, yaw, x, y, z), self.site_now)
+        self.set_sites(sites)
         self.wait_all_reach()
 
+    def body_left(self, i):
+        self.move_body(x=-i)
+
     def body_right(self, i):
-        self.set_site(0, self.site_now[0][0] - i, self.KEEP, self.KEEP)
-        self.set_site(1, self.site_now[1][0] - i, self.KEEP, self.KEEP)
-        self.set_site(2, self.site_now[2][0] + i, self.KEEP, self.KEEP)
-        self.set_site(3, self.site_now[3][0] + i, self.KEEP, self.KEEP)
-        self.wait_all_reach()
+        self.move_body(x=i)
 
     def hand_wave(self, i):
         self.move_speed = 1
@@ -504,30 +779,35 @@ class RobotKinematics:
             self.body_right(15)
 
     def head_up(self, i):
-        self.set_site(0, self.KEEP, self.KEEP, self.site_now[0][2] - i)
-        self.set_site(1, self.KEEP, self.KEEP, self.site_now[1][2] + i)
-        self.set_site(2, self.KEEP, self.KEEP, self.site_now[2][2] - i)
-        self.set_site(3, self.KEEP, self.KEEP, self.site_now[3][2] + i)
+        # Lower the front feet and raise the back ones by i mm; move_body(pitch=...) is a true pitch
+        z = self.site_now[:, 2]
+        self.set_sites([
+            (self.KEEP, self.KEEP, z[0] - i),
+            (self.KEEP, self.KEEP, z[1] + i),
+            (self.KEEP, self.KEEP, z[2] - i),
+            (self.KEEP, self.KEEP, z[3] + i),
+        ])
         self.wait_all_reach()
 
     def head_down(self, i):
-        self.set_site(0, self.KEEP, self.KEEP, self.site_now[0][2] + i)
-        self.set_site(1, self.KEEP, self.KEEP, self.site_now[1][2] - i)
-        self.set_site(2, self.KEEP, self.KEEP, self.site_now[2][2] + i)
-        self.set_site(3, self.KEEP, self.KEEP, self.site_now[3][2] - i)
+        z = self.site_now[:, 2]
+        self.set_sites([
+            (self.KEEP, self.KEEP, z[0] + i),
+            (self.KEEP, self.KEEP, z[1] - i),
+            (self.KEEP, self.KEEP, z[2] + i),
+            (self.KEEP, self.KEEP, z[3] - i),
+        ])
         self.wait_all_reach()
 
     def body_dance(self, i):
         self.body_dance_speed = 2
         self.sit()
         self.move_speed = 1
-        for leg in range(4):
-            self.set_site(leg, self.x_default, self.y_default, self.KEEP)
+        self.set_sites([(self.x_default, self.y_default, self.KEEP)] * 4)
         self.wait_all_reach()
 
         # Lower body slightly
-        for leg in range(4):
-            self.set_site(leg, self.x_default, self.y_default, self.z_default - 20)
+        self.set_sites([(self.x_default, self.y_default, self.z_default - 20)] * 4)
         self.wait_all_reach()
 
         self.move_speed = self.body_dance_speed
@@ -537,15 +817,19 @@ class RobotKinematics:
                 self.move_speed = self.body_dance_speed * 2
             if j > i / 2:
                 self.move_speed = self.body_dance_speed * 3
-            self.set_site(0, self.KEEP, self.y_default - 20, self.KEEP)
-            self.set_site(1, self.KEEP, self.y_default + 20, self.KEEP)
-            self.set_site(2, self.KEEP, self.y_default - 20, self.KEEP)
-            self.set_site(3, self.KEEP, self.y_default + 20, self.KEEP)
+            self.set_sites([
+                (self.KEEP, self.y_default - 20, self.KEEP),
+                (self.KEEP, self.y_default + 20, self.KEEP),
+                (self.KEEP, self.y_default - 20, self.KEEP),
+                (self.KEEP, self.y_default + 20, self.KEEP),
+            ])
             self.wait_all_reach()
-            self.set_site(0, self.KEEP, self.y_default + 20, self.KEEP)
-            self.set_site(1, self.KEEP, self.y_default - 20, self.KEEP)
-            self.set_site(2, self.KEEP, self.y_default + 20, self.KEEP)
-            self.set_site(3, self.KEEP, self.y_default - 20, self.KEEP)
+            self.set_sites([
+                (self.KEEP, self.y_default + 20, self.KEEP),
+                (self.KEEP, self.y_default - 20, self.KEEP),
+                (self.KEEP, self.y_default + 20, self.KEEP),
+                (self.KEEP, self.y_default - 20, self.KEEP),
+            ])
             self.wait_all_reach()
 
         self.move_speed = self.body_dance_speed
@@ -0,0 +1,48 @@
+import numpy as np
+
+
+class LegStateStore:
+    """Double-buffered (4, 3) float64 foot positions.
+
+    A writer fills the back buffer and publishes it by bumping `version`,
+    which flips front and back in a single attribute store. Readers never
+    lock: `front()` is the last published buffer and `snapshot()` copies it,
+    retrying if anything was published during the copy, since the writer's
+    next begin() refills the buffer that was just read. Writers must be
+    serialized by the caller; RobotKinematics does that with `reach_cond`
+    or by only writing from the servo thread.
+    """
+
+    def __init__(self, sites=None):
+        self.buffers = np.zeros((2, 4, 3))
+        self.version = 0
+        if sites is not None:
+            self.buffers[0] = sites
+
+    def front(self):
+        # Last published state; valid until the writer begins the next state after another publish
+        return self.buffers[self.version & 1]
+
+    def begin(self):
+        # Back buffer, primed with the published state, for the writer to edit
+        back = self.buffers[(self.version + 1) & 1]
+        np.copyto(back, self.buffers[self.version & 1])
+        return back
+
+    def publish(self):
+        self.version += 1
+
+    def write(self, sites):
+        # Publish a complete 4x3 state in one go
+        np.copyto(self.begin(), sites)
+        self.publish()
+
+    def snapshot(self, out=None):
+        # Consistent copy of the published state
+        if out is None:
+            out = np.empty((4, 3))
+        while True:
+            version = self.version
+            np.copyto(out, self.buffers[version & 1])
+            if self.version == version:
+                return out
@@ -1,16 +1,27 @@
+import startup  # First, so the startup report counts the time spent importing everything else
 from kinematics import RobotKinematics
+import sys
 import time
 
-def main():
+def sim_robot():
+    # Robot on a simulated servo board running in virtual time
+    from clock import VirtualClock
+    from servo_backend import SimServoBackend
+
+    clock = VirtualClock()
+    return RobotKinematics(backend=SimServoBackend(clock), clock=clock)
+
+def main(robot=None):
     # Initialize the robot
-    robot = RobotKinematics()
+    if robot is None:
+        robot = RobotKinematics()
     robot.setup()
     #time.sleep(2)
 
     # Sequence of actions
     print("Robot standing...")
     robot.stand()
-    time.sleep(0.5)
+    robot.clock.sleep(0.5)
 
     print("Robot stepping forward...")
     robot.step_forward(2)
@@ -55,4 +66,16 @@ def main():
     print("Demo complete.")
 
 if __name__ == "__main__":
-    main()
+    if "--sim" in sys.argv:
+        robot = sim_robot()
+        start = time.perf_counter()
+        main(robot)
+        print(f"Simulated {robot.clock.now():.1f} s of motion in {time.perf_counter() - start:.3f} s")
+    else:
+        robot = RobotKinematics()
+        main(robot)
+    if "--telemetry" in sys.argv:
+        # Save the servo ticks of the run for offline analysis
+        path = sys.argv[sys.argv.index("--telemetry") + 1]
+        robot.telemetry.dump(path)
+        print(f"Wrote {len(robot.telemetry)} ticks to {path}")
@@ -0,0 +1,259 @@
+import http.client
+import http.server
+import socket
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+
+from frame_queue import LatestFrame
+
+# Multipart layout of the legionEYE firmware's :81/stream
+BOUNDARY = b"123456789000000000000987654321"
+PART_HEADER = b"Content-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n"
+
+
+def read_exact(stream, n):
+    # Exactly n bytes, or None if the stream ends first
+    data = stream.read(n)
+    if len(data) == n:
+        return data
+    parts = [data]
+    missing = n - len(data)
+    while missing:
+        chunk = stream.read(missing)
+        if not chunk:
+            return None
+        parts.append(chunk)
+        missing -= len(chunk)
+    return b"".join(parts)
+
+
+def read_until(stream, marker):
+    # Part body up to the next boundary line, for parts without Content-Length
+    lines = []
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        if line.rstrip() == marker:
+            return b"".join(lines)[:-2]  # The CRLF before the boundary isn't part of the body
+        lines.append(line)
+
+
+def iter_parts(stream, boundary=BOUNDARY):
+    """Yield the body of each part of a multipart stream, reading it part by part.
+
+    Parts are cut at Content-Length when the part has one, so JPEG data is
+    read in one piece and never scanned for the boundary.
+    """
+    marker = b"--" + boundary
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        line = line.strip()
+        if not line or line == marker:
+            continue  # Blank lines and boundaries between parts; the firmware sends no boundary before the first
+        if line == marker + b"--":
+            return
+        headers = {}
+        while line:
+            name, _, value = line.partition(b":")
+            headers[name.strip().lower()] = value.strip()
+            line = stream.readline().strip()
+        length = headers.get(b"content-length")
+        body = read_exact(stream, int(length)) if length is not None else read_until(stream, marker)
+        if body is None:
+            return
+        yield body
+
+
+def stream_boundary(content_type):
+    # Boundary from a multipart Content-Type header, the firmware's by default
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "boundary":
+            return value.strip('"').encode()
+    return BOUNDARY
+
+
+class MJPEGStream:
+    """Reads an MJPEG-over-HTTP stream, e.g. the ESP32-CAM's http://<ip>:81/stream.
+
+    A reader thread pulls parts off the connection and keeps only the newest
+    JPEG, undecoded. read() decodes that one, so frames that arrive while the
+    caller is busy are skipped without ever being decoded. Dropped
+    connections are retried with backoff. read() and release() match
+    cv2.VideoCapture, so it can stand in for a camera in ObjectTracker.
+    """
+
+    def __init__(self, url, timeout=5.0, retry_delay=0.5, max_retry_delay=5.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.frames = LatestFrame()
+        self.last_seq = 0
+        self.received = 0
+        self.decoded = 0
+        self.skipped = 0
+        self.reconnects = 0
+        self.running = True
+        self.connection = None
+        self.thread = threading.Thread(target=self.receive, daemon=True)
+        self.thread.start()
+
+    def connect(self):
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        self.connection.request("GET", self.path)
+        response = self.connection.getresponse()
+        if response.status != 200:
+            raise ConnectionError(f"Stream returned HTTP {response.status}")
+        return response, stream_boundary(response.getheader("Content-Type", ""))
+
+    def receive(self):
+        # Reader thread: stay connected and publish each JPEG as it completes
+        delay = self.retry_delay
+        while self.running:
+            try:
+                response, boundary = self.connect()
+                delay = self.retry_delay
+                for jpeg in iter_parts(response, boundary):
+                    self.received += 1
+                    self.frames.put(jpeg, time.monotonic())
+                    if not self.running:
+                        break
+            except (OSError, http.client.HTTPException, ValueError):
+                pass
+            finally:
+                if self.connection is not None:
+                    self.connection.close()
+            if self.running:
+                self.reconnects += 1
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+        self.frames.close()
+
+    def read(self, timeout=None):
+        # Newest frame as (True, BGR image); waits for one newer than the last read, (False, None) once released
+        while True:
+            item = self.frames.get(self.last_seq, timeout)
+            if item is None:
+                return False, None
+            jpeg, seq, _ = item
+            self.skipped += seq - self.last_seq - 1
+            self.last_seq = seq
+            frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is not None:  # Skip a corrupt part rather than end the stream
+                self.decoded += 1
+                return True, frame
+
+    def release(self):
+        self.running = False
+        connection = self.connection
+        if connection is not None and connection.sock is not None:
+            try:
+                connection.sock.shutdown(socket.SHUT_RDWR)  # Unblocks the reader thread, which closes it
+            except OSError:
+                pass
+        self.frames.close()
+
+    def stats(self):
+        return {"received": self.received, "decoded": self.decoded, "skipped": self.skipped,
+                "reconnects": self.reconnects}
+
+
+def load_recording(path):
+    # JPEG frames from a saved multipart stream (see `record`) or any video file OpenCV can read
+    with open(path, "rb") as f:
+        frames = list(iter_parts(f))
+    if frames:
+        return frames
+    capture = cv2.VideoCapture(path)
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(cv2.imencode(".jpg", frame)[1].tobytes())
+    capture.release()
+    return frames
+
+
+class ReplayHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the server's frames in a loop the way legionEYE does: chunked multipart JPEG."""
+
+    protocol_version = "HTTP/1.1"
+
+    def chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def do_GET(self):
+        if self.path != "/stream":
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "multipart/x-mixed-replace;boundary=" + BOUNDARY.decode())
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        period = 1.0 / self.server.fps
+        next_frame = time.monotonic()
+        try:
+            while True:
+                for jpeg in self.server.frames:
+                    self.chunk(PART_HEADER % len(jpeg))
+                    self.chunk(jpeg)
+                    self.chunk(b"\r\n--" + BOUNDARY + b"\r\n")
+                    next_frame += period
+                    time.sleep(max(next_frame - time.monotonic(), 0.0))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(path, port=81, fps=20.0):
+    """Stand-in for the ESP32-CAM: replay a recording on http://localhost:<port>/stream. Returns the server."""
+    server = http.server.ThreadingHTTPServer(("", port), ReplayHandler)
+    server.daemon_threads = True
+    server.frames = load_recording(path)
+    server.fps = fps
+    if not server.frames:
+        raise ValueError(f"No frames in {path}")
+    return server
+
+
+def record(url, path, seconds=10.0):
+    # Save the raw multipart body of a live stream, replayable with `serve`
+    stream = MJPEGStream(url)
+    end = time.monotonic() + seconds
+    seq = 0
+    with open(path, "wb") as f:
+        while time.monotonic() < end:
+            item = stream.frames.get(seq, timeout=end - time.monotonic())
+            if item is None:
+                break
+            jpeg, seq, _ = item
+            f.write(b"--" + BOUNDARY + b"\r\n" + PART_HEADER % len(jpeg) + jpeg + b"\r\n")
+    stream.release()
+    return seq
+
+
+if __name__ == "__main__":
+    # mjpeg_stream.py serve FILE [PORT] | record URL FILE [SECONDS]
+    if len(sys.argv) >= 3 and sys.argv[1] == "serve":
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else 81
+        print(f"Replaying {sys.argv[2]} on http://localhost:{port}/stream")
+        serve(sys.argv[2], port).serve_forever()
+    elif len(sys.argv) >= 4 and sys.argv[1] == "record":
+        seconds = float(sys.argv[4]) if len(sys.argv) > 4 else 10.0
+        print(f"Recorded {record(sys.argv[2], sys.argv[3], seconds)} frames")
+    else:
+        print("usage: mjpeg_stream.py serve FILE [PORT] | record URL FILE [SECONDS]")
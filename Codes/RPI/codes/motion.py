@@ -0,0 +1,83 @@
+import concurrent.futures
+import threading
+import time
+
+
+class MotionCancelled(Exception):
+    """Raised in the waiting thread when the motion it waits on is cancelled."""
+
+
+class MotionHandle(concurrent.futures.Future):
+    """Completion handle returned by `set_site`.
+
+    Resolves with the leg's foot position once `servo_service` brings the leg
+    to rest, or fails with MotionCancelled if the robot's motion is cancelled
+    first. It is a regular `concurrent.futures.Future`, so it can be polled
+    with `done()`, blocked on with `result()`, chained with `then()` or
+    awaited from asyncio code.
+    """
+
+    def __init__(self, leg):
+        super().__init__()
+        self.leg = leg
+        self.reached_at = None  # time.monotonic() of the tick that finished the move
+
+    def reach(self, site):
+        # Called by the servo loop once the leg is at rest
+        self.reached_at = time.monotonic()
+        if not self.cancelled():  # Nobody is waiting for a handle its owner cancelled
+            self.set_result(list(site))
+
+    def then(self, callback):
+        # Run `callback(site)` once done and return a handle for its result
+        chained = concurrent.futures.Future()
+
+        def _run(handle):
+            # A cancelled motion skips `callback` and fails the chained handle the same way
+            if handle.cancelled():
+                chained.cancel()
+                return
+            error = handle.exception()
+            if error is not None:
+                chained.set_exception(error)
+                return
+            try:
+                chained.set_result(callback(handle.result()))
+            except Exception as e:
+                chained.set_exception(e)
+
+        self.add_done_callback(_run)
+        return chained
+
+    def __await__(self):
+        import asyncio  # Only asyncio users pay for importing it, not the robot's startup
+
+        return asyncio.wrap_future(self).__await__()
+
+
+def all_reached(handles):
+    # Handle that resolves once every handle in `handles` is done
+    combined = concurrent.futures.Future()
+    handles = list(handles)
+    remaining = [len(handles)]
+    lock = threading.Lock()
+
+    def _one_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] != 0:
+                return
+        if any(h.cancelled() for h in handles):
+            combined.cancel()
+            return
+        errors = [h.exception() for h in handles if h.exception() is not None]
+        if errors:
+            combined.set_exception(errors[0])
+        else:
+            combined.set_result([h.result() for h in handles])
+
+    if not handles:
+        combined.set_result([])
+    for handle in handles:
+        handle.add_done_callback(_one_done)
+    return combined
@@ -0,0 +1,167 @@
+import itertools
+import threading
+import time
+
+from body_pose import BodyPoseController
+from control_loop import TickHistogram
+from motion import MotionCancelled
+
+# Lower runs first
+STOP = 0
+DRIVE = 1
+MOTION = 2
+
+
+class MotionCommand:
+    def __init__(self, name, action, args, priority, seq):
+        self.name = name
+        self.action = action
+        self.args = args
+        self.priority = priority
+        self.seq = seq
+        self.submitted = time.monotonic()
+
+    @property
+    def key(self):
+        # Commands with the same key are coalesced while queued; continuous ones only keep the newest
+        return self.name if self.priority == DRIVE else (self.name, self.args)
+
+
+class MotionExecutor:
+    """Single owner of the robot's motion, fed from a priority command queue.
+
+    Request handlers call submit()/drive()/stop() and return straight away.
+    One worker thread runs the queued motions one at a time, so nothing else
+    touches `site_expect` or `move_speed`. stop() cancels the running motion
+    through RobotKinematics.cancel(), which wakes the worker within a tick.
+    A repeated command that is still queued is dropped, and a newer drive
+    or pose command replaces a queued one. Motions start from wherever the
+    feet are, drive commands retarget the running gait mid-stride and pose
+    commands retarget the body pose stream, so transitions are blended rather
+    than reset.
+    """
+
+    def __init__(self, robot, gait, poser=None):
+        self.robot = robot
+        self.gait = gait
+        self.poser = poser if poser is not None else BodyPoseController(robot)
+        self.queue = []
+        self.cond = threading.Condition()
+        self.seq = itertools.count()
+        self.current = None
+        self.latency = TickHistogram(bin_width=0.001, bins=500)
+        self.completed = 0
+        self.cancelled = 0
+        self.coalesced = 0
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def submit(self, name, action, *args, priority=MOTION):
+        command = MotionCommand(name, action, args, priority, next(self.seq))
+        with self.cond:
+            if priority == MOTION and self.current is not None and self.current.key == command.key:
+                self.coalesced += 1
+                return self.current
+            for i, queued in enumerate(self.queue):
+                if queued.key == command.key:
+                    if command.priority == DRIVE:
+                        self.queue[i] = queued = command
+                    self.coalesced += 1
+                    self.cond.notify()
+                    return queued  # The command that will actually run
+            self.queue.append(command)
+            self.cond.notify()
+        return command
+
+    def drive(self, vx=0.0, vy=0.0, yaw_rate=0.0):
+        # Walk at a velocity; retargets the gait if it's already running
+        return self.submit("drive", self.run_drive, vx, vy, yaw_rate, priority=DRIVE)
+
+    def pose(self, roll=0.0, pitch=0.0, yaw=0.0, x=0.0, y=0.0, z=0.0):
+        # Lean/turn/shift the body over planted feet (radians, mm); meant to be called at control rate
+        return self.submit("pose", self.run_pose, roll, pitch, yaw, x, y, z, priority=DRIVE)
+
+    def stop(self):
+        # Preempt everything: drop queued commands, cancel the running motion or gait phase and stand still
+        streaming = self.gait.running or self.poser.running
+        if self.gait.running:
+            self.gait.finish()  # Stops streaming setpoints from the next tick on
+        if self.poser.running:
+            self.poser.finish()
+        with self.cond:
+            self.queue = []
+            # Driving and posing run as tick hooks with no current command; cancel() holds their feet too
+            if streaming or (self.current is not None and self.current.priority != STOP):
+                self.robot.cancel()
+        return self.submit("stop", self.run_stop, priority=STOP)
+
+    def run_drive(self, vx, vy, yaw_rate):
+        if self.poser.running:
+            self.poser.finish()  # Walk off from the posed stance
+        if not self.gait.running or self.gait.stopping:
+            self.gait.start()
+        self.gait.set_command(vx, vy, yaw_rate)
+
+    def run_pose(self, *pose):
+        if self.gait.running:
+            self.gait.stop()  # Feet have to be planted first
+        if not self.poser.running:
+            self.poser.start()
+        self.poser.set_pose(*pose)
+
+    def run_stop(self):
+        self.robot.resume()
+        if self.gait.running:
+            self.gait.finish()
+        if self.poser.running:
+            self.poser.finish()
+        self.poser.restore()
+        self.robot.stand()
+        self.robot.settle()
+
+    def next_command(self):
+        with self.cond:
+            self.cond.wait_for(lambda: self.queue)
+            command = min(self.queue, key=lambda c: (c.priority, c.seq))
+            self.queue.remove(command)
+            self.current = command
+            return command
+
+    def run(self):
+        while True:
+            command = self.next_command()
+            try:
+                self.execute(command)
+            finally:
+                with self.cond:
+                    self.current = None
+
+    def execute(self, command):
+        try:
+            if command.priority == MOTION and self.poser.running:
+                self.poser.finish()  # One-shot motions start from the posed stance
+            if command.priority == MOTION and self.gait.running:
+                self.gait.stop()  # One-shot motions need the feet back from the gait first
+            self.latency.add(time.monotonic() - command.submitted)
+            command.action(*command.args)
+            self.completed += 1
+        except MotionCancelled:
+            self.robot.resume()
+            self.cancelled += 1
+
+    def idle(self):
+        # True when nothing is running or queued
+        with self.cond:
+            return self.current is None and not self.queue
+
+    def stats(self):
+        with self.cond:
+            depth = len(self.queue)
+            current = self.current.name if self.current is not None else None
+        return {
+            "queue_depth": depth,
+            "current": current,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "coalesced": self.coalesced,
+            "latency": self.latency.summary(),
+        }
@@ -0,0 +1,205 @@
+import struct
+import sys
+
+import numpy as np
+
+from atomic_file import atomic_write
+
+# File layout: header, then (delta files only) one absolute keyframe every `keyframe` records, then the
+# fixed-width records. Each record is 12 servo angles followed by 12 foot coordinates, legs in order.
+MAGIC = b"LGMR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIff")  # magic, version, flags, count, keyframe interval, rate Hz, move_speed
+FLAG_DELTA = 1  # Records are int8 changes from the previous record instead of absolute int16 values
+ANGLE_UNIT = 0.1  # Degrees per count; finer than the PCA9685's ~0.27 degree step
+SITE_UNIT = 0.1  # mm per count
+UNITS = np.array([ANGLE_UNIT] * 12 + [SITE_UNIT] * 12)
+KEYFRAME = 50  # Records per keyframe in delta files, bounds the work of a seek
+
+
+def quantize(angles, sites):
+    # (T, 4, 3) angles and sites to (T, 24) integer counts
+    values = np.concatenate((np.reshape(angles, (-1, 12)), np.reshape(sites, (-1, 12))), axis=1)
+    return np.rint(values / UNITS).astype(np.int32)
+
+
+def save(path, angles, sites, rate, move_speed=0.0, delta=True):
+    """Write a tick-by-tick angle and foot position stream; returns True if it was delta-encoded.
+
+    Delta records take 24 bytes a tick instead of 48 (a float64 GaitTable
+    takes 192), but only fit motions that never move a servo more than 12.7
+    degrees or a foot more than 12.7 mm in one tick; anything faster is
+    stored absolute.
+    """
+    counts = quantize(angles, sites)
+    if not len(counts):
+        raise ValueError("No ticks to save")
+    steps = np.diff(counts, axis=0)
+    delta = delta and (len(steps) == 0 or np.abs(steps).max() <= 127)
+    with atomic_write(path) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, FLAG_DELTA if delta else 0, len(counts), KEYFRAME, rate, move_speed))
+        if delta:
+            f.write(counts[::KEYFRAME].astype("<i2").tobytes())
+            records = np.zeros_like(counts)
+            records[1:] = steps
+            f.write(records.astype("i1").tobytes())
+        else:
+            f.write(counts.astype("<i2").tobytes())
+    return delta
+
+
+class MotionRecorder:
+    """Captures what the servo loop commands, tick by tick, for saving as a motion file.
+
+    Set it as `robot.recorder`; servo_service then hands it the angles and
+    foot positions of every tick, live gaits and table playback alike.
+    Storage grows in doubling chunks, so a tick costs one row copy.
+    """
+
+    def __init__(self, rate, capacity=3000):
+        self.rate = rate
+        self.angles = np.zeros((capacity, 4, 3))
+        self.sites = np.zeros((capacity, 4, 3))
+        self.count = 0
+
+    def add(self, sites, angles):
+        if self.count == len(self.angles):
+            self.angles = np.concatenate((self.angles, np.zeros_like(self.angles)))
+            self.sites = np.concatenate((self.sites, np.zeros_like(self.sites)))
+        self.angles[self.count] = angles
+        self.sites[self.count] = sites
+        self.count += 1
+
+    def save(self, path, move_speed=0.0, delta=True):
+        return save(path, self.angles[:self.count], self.sites[:self.count], self.rate, move_speed, delta)
+
+
+class MotionFile:
+    """A motion file memory-mapped for playback.
+
+    Frames are decoded on demand straight from the mapping, so opening a
+    long choreography costs nothing and memory use doesn't grow with it.
+    Any frame can be reached in O(1): absolute files index it directly,
+    delta files start from the nearest keyframe, and stepping to the next
+    frame adds one record.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"Not a motion file: {path}")
+        magic, version, flags, count, keyframe, rate, move_speed = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} motion file: {path}")
+        self.path = path
+        self.count = count
+        self.rate = rate
+        self.move_speed = move_speed
+        self.delta = bool(flags & FLAG_DELTA)
+        self.keyframe = keyframe
+        offset = HEADER.size
+        self.keys = None
+        if self.delta:
+            keys = -(-count // keyframe)
+            self.keys = np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(keys, 24))
+            offset += self.keys.nbytes
+            self.records = np.memmap(path, dtype="i1", mode="r", offset=offset, shape=(count, 24))
+        else:
+            self.records = np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(count, 24))
+        self.counts = np.zeros(24, dtype=np.int32)  # Decoded counts of frame `cursor`
+        self.cursor = -1
+        self.values = np.zeros(24)  # Scratch for the scaled frame
+
+    def __len__(self):
+        return self.count
+
+    def decode(self, i):
+        # Integer counts of frame i, continuing from the previous call when i is the next frame
+        if not self.delta:
+            self.counts[:] = self.records[i]
+        elif i == self.cursor + 1 and i % self.keyframe:
+            self.counts += self.records[i]
+        elif i != self.cursor:
+            start = i - i % self.keyframe
+            self.counts[:] = self.keys[start // self.keyframe]
+            self.counts += self.records[start + 1:i + 1].sum(axis=0, dtype=np.int32)
+        self.cursor = i
+        return self.counts
+
+    def frame(self, i):
+        """(angles, sites) of frame i as (4, 3) arrays; reused between calls."""
+        np.multiply(self.decode(i), UNITS, out=self.values)
+        return self.values[:12].reshape(4, 3), self.values[12:].reshape(4, 3)
+
+    def close(self):
+        # Drop the mappings; the file is unmapped once no frame views are left
+        self.keys = self.records = None
+
+
+class MotionPlayer:
+    """Plays a MotionFile on a robot's servo loop at the recorded rate times `speed`.
+
+    Has the same frame()/len()/move_speed interface as GaitTable, so
+    RobotKinematics.play() streams it straight to the servo backend with no
+    IK or planning in the loop. Tick i of playback shows recorded frame
+    start + i * speed * rate / control_rate, so seek() is just a new start.
+    """
+
+    def __init__(self, motion, control_rate, speed=1.0, start=0):
+        if speed <= 0:
+            raise ValueError(f"Playback speed must be positive, got {speed}")
+        self.motion = motion
+        self.move_speed = motion.move_speed
+        self.step = speed * motion.rate / control_rate
+        self.seek(start)
+
+    def seek(self, frame):
+        # Start playback at recorded frame `frame` (a float for a time, frame = seconds * rate)
+        self.start = min(max(frame, 0), len(self.motion) - 1)
+
+    def __len__(self):
+        return int((len(self.motion) - 1 - self.start) / self.step) + 1
+
+    def frame(self, i):
+        return self.motion.frame(int(self.start + i * self.step))
+
+
+def play(robot, path, speed=1.0, start=0.0):
+    # Replay the motion file at `path` on `robot` from `start` seconds in and wait for it to end
+    motion = MotionFile(path)
+    try:
+        robot.play(MotionPlayer(motion, robot.loop.rate, speed, start * motion.rate))
+    finally:
+        motion.close()
+
+
+def compile_gait(robot, path, gait, *args, delta=True):
+    # Record `gait(*args)` from the robot's current pose in simulated time and save it as a motion file
+    from gait_compiler import GaitCompiler
+
+    table = GaitCompiler(robot).compile(gait, *args)
+    return save(path, table.angles, table.sites, robot.control_rate, table.move_speed, delta)
+
+
+if __name__ == "__main__":
+    # motion_file.py compile GAIT OUT [ARGS...] | play FILE [SPEED] [--sim] | info FILE
+    import main as demo
+
+    argv = [arg for arg in sys.argv[1:] if arg != "--sim"]
+    if len(argv) >= 2 and argv[0] == "info":
+        motion = MotionFile(argv[1])
+        print(f"{len(motion)} frames at {motion.rate:g} Hz ({len(motion) / motion.rate:.2f} s), "
+              f"{'delta' if motion.delta else 'absolute'} encoding")
+    elif (len(argv) >= 3 and argv[0] == "compile") or (len(argv) >= 2 and argv[0] == "play"):
+        robot = demo.sim_robot() if "--sim" in sys.argv or argv[0] == "compile" else demo.RobotKinematics()
+        robot.setup()
+        robot.stand()
+        if argv[0] == "compile":
+            args = [int(arg) for arg in argv[3:]]
+            delta = compile_gait(robot, argv[2], argv[1], *args)
+            print(f"Wrote {argv[2]} ({'delta' if delta else 'absolute'} encoding)")
+        else:
+            play(robot, argv[1], float(argv[2]) if len(argv) > 2 else 1.0)
+    else:
+        print("usage: motion_file.py compile GAIT OUT [ARGS...] | play FILE [SPEED] [--sim] | info FILE")
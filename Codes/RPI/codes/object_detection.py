@@ -1,94 +1,232 @@
+import sys
+import threading
+import time
+from collections import namedtuple
+
 import cv2
-import numpy as np
-from robot_kinematics import RobotKinematics
 
-class ObjectTracker:
+from color_detector import ColorDetector
+from control_loop import TickHistogram
+from frame_queue import LatestFrame
+from frame_sources import ImageDirSource, SyntheticBlobSource, VideoFileSource
+from gait import VelocityGait
+from kinematics import RobotKinematics
+from mjpeg_stream import MJPEGStream
+from motion_executor import MotionExecutor
+from target_tracker import TargetTracker
+from vision_pool import ParallelDetector
+from visual_servo import VisualServo
+
+
+# One processed frame; detect_time is the detection's own latency in seconds
+Detection = namedtuple("Detection", "seq position area frame captured_at detect_time")
+
+
+class StageStats:
+    """Frame rate and frame age (time since capture) of one pipeline stage."""
+
     def __init__(self):
-        self.robot = RobotKinematics()  # Initialize robot kinematics
-        self.robot.setup()
-        self.robot.stand()
-        self.capture = cv2.VideoCapture(0)  # Use the first camera (can replace with a specific path)
-        self.target_position = (320, 240)  # Assume center of the frame (for 640x480 resolution)
-        self.frame_center = (320, 240)  # Center of a 640x480 frame
-        self.threshold = 30  # Pixel threshold for considering the object aligned
-
-    def process_frame(self, frame):
-        """Process the frame to detect the object and get its position."""
-        # Convert to HSV color space
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-        # Define color range for tracking (e.g., red object)
-        lower_color = np.array([0, 100, 100])  # Adjust for your target object
-        upper_color = np.array([10, 255, 255])
-
-        # Create a mask for the target color
-        mask = cv2.inRange(hsv, lower_color, upper_color)
-
-        # Find contours in the mask
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        if contours:
-            # Find the largest contour
-            largest_contour = max(contours, key=cv2.contourArea)
-            if cv2.contourArea(largest_contour) > 500:  # Ignore small objects
-                # Get the center of the object
-                M = cv2.moments(largest_contour)
-                if M["m00"] > 0:
-                    cx = int(M["m10"] / M["m00"])
-                    cy = int(M["m01"] / M["m00"])
-                    return (cx, cy)
-
-        return None  # No object found
+        self.frames = 0
+        self.fps = 0.0
+        self.window_start = time.monotonic()
+        self.window_frames = 0
+        self.age = TickHistogram(bin_width=0.001, bins=1000)
+
+    def add(self, captured_at):
+        now = time.monotonic()
+        self.frames += 1
+        self.window_frames += 1
+        self.age.add(now - captured_at)
+        # Rate over roughly the last second
+        if now - self.window_start >= 1.0:
+            self.fps = self.window_frames / (now - self.window_start)
+            self.window_start, self.window_frames = now, 0
+
+    def summary(self):
+        return {"frames": self.frames, "fps": self.fps, "age": self.age.summary()}
 
-    def track_object(self):
-        """Main loop for tracking the object."""
-        while True:
+
+class ObjectTracker:
+    """Follows a colored object with the camera.
+
+    Capture runs on its own thread and only the newest frame is kept, so
+    detection always works on a fresh image instead of draining a buffer of
+    stale ones. Every detection updates a VisualServo, which retargets the
+    walking gait through a MotionExecutor without waiting on it. With
+    `workers` set, detection runs in that many processes fed through shared
+    memory and results come back in frame order. `capture` can be a camera,
+    an MJPEGStream or any FrameSource; `headless` skips the preview window.
+    """
+
+    def __init__(self, robot=None, capture=None, executor=None, detector=None, workers=0, servo=None,
+                 headless=False):
+        if robot is None:
+            robot = RobotKinematics()  # Initialize robot kinematics
+            robot.setup()
+            robot.stand()
+        self.robot = robot
+        if executor is None:
+            executor = MotionExecutor(robot, VelocityGait(robot))
+        self.executor = executor
+        self.servo = servo if servo is not None else VisualServo(executor.gait, executor)
+        if capture is None:
+            capture = cv2.VideoCapture(0)  # Use the first camera (can replace with a specific path)
+            capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Keep the driver from queueing old frames too
+        self.capture = capture
+        # Red object by default; adjust the HSV range for your target
+        if detector is None:
+            detector = ColorDetector(lower=(0, 100, 100), upper=(10, 255, 255))
+        self.detector = detector
+        self.target = TargetTracker(detector)  # Smooths detections and predicts through dropouts
+        self.pool = None
+        if workers:
+            self.pool = ParallelDetector(workers, lower=detector.lower, upper=detector.upper,
+                                         min_area=detector.min_area, level=detector.level)
+
+        self.frames = LatestFrame()
+        self.capture_stats = StageStats()
+        self.detect_stats = StageStats()
+        self.position = None  # Last detection, None if the object wasn't found
+        self.headless = headless
+        self.log = None  # Set to a list to record (seq, captured_at, detect_time, commanded_at, position) per frame
+        self.running = False
+        self.capture_thread = None
+
+    def process_frame(self, frame, captured_at=None):
+        """Process the frame to detect the object and get its (filtered) position."""
+        return self.target.update(frame, time.monotonic() if captured_at is None else captured_at)
+
+    def detections(self, frame, seq, captured_at):
+        """Detections finished after taking in `frame` (None for no new frame), oldest first."""
+        if self.pool is None:
+            if frame is None:
+                return []
+            start = time.monotonic()
+            position = self.process_frame(frame, captured_at)
+            return [Detection(seq, position, self.target.area, frame, captured_at, time.monotonic() - start)]
+        if frame is not None:
+            self.pool.submit(frame, (frame, seq, captured_at, time.monotonic()))
+        detections = []
+        for (position, area), (frame, seq, captured_at, submitted_at) in self.pool.results():
+            position = self.target.observe(position, area, captured_at)
+            detections.append(Detection(seq, position, self.target.area, frame, captured_at,
+                                        time.monotonic() - submitted_at))
+        return detections
+
+    def capture_loop(self):
+        """Read frames as fast as the camera delivers them, replacing any not yet processed."""
+        while self.running:
             ret, frame = self.capture.read()
             if not ret:
                 print("Failed to capture frame")
                 break
+            captured_at = time.monotonic()
+            self.capture_stats.add(captured_at)
+            self.frames.put(frame, captured_at)
+        self.frames.close()
+
+    def start(self):
+        self.running = True
+        self.capture_thread = threading.Thread(target=self.capture_loop, daemon=True)
+        self.capture_thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.capture_thread is not None and self.capture_thread is not threading.current_thread():
+            self.capture_thread.join()
+            self.capture_thread = None
+
+    def stats(self):
+        return {
+            "capture": self.capture_stats.summary(),
+            "detect": self.detect_stats.summary(),
+            "dropped_frames": self.frames.seq - self.detect_stats.frames,  # Replaced before detection got to them
+            "position": self.position,
+            "motion": self.executor.stats()["current"],
+            "setpoints": self.servo.setpoints(),
+            "target": self.target.stats(),
+        }
+
+    def report(self):
+        stats = self.stats()
+        capture, detect = stats["capture"], stats["detect"]
+        found = f"Object position: {self.position}" if self.position else "Object not detected"
+        print(f"{found} | capture {capture['fps']:.1f} fps, detect {detect['fps']:.1f} fps, "
+              f"frame age p50 {detect['age']['p50_ms']:.0f} ms, dropped {stats['dropped_frames']}, "
+              f"motion {stats['motion']}, setpoints {stats['setpoints']}")
 
-            # Get the object's position
-            position = self.process_frame(frame)
-
-            if position:
-                cv2.circle(frame, position, 10, (0, 255, 0), -1)  # Mark the object
-                print(f"Object position: {position}")
-                self.move_robot(position)
-            else:
-                print("Object not detected")
-
-            # Display the frame
-            cv2.imshow("Object Tracking", frame)
-
-            # Exit on 'q' key press
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+    def track_object(self):
+        """Main loop for tracking the object."""
+        self.start()
+        seq = 0
+        last_report = time.monotonic()
+        # Poll often with workers, their results can land between frames
+        timeout = 1.0 if self.pool is None else 0.005
+        try:
+            while self.running:
+                item = self.frames.get(seq, timeout=timeout)
+                if item is None:
+                    if self.frames.closed:
+                        break
+                    frame = captured_at = None
+                else:
+                    frame, seq, captured_at = item
+
+                # Get the object's position
+                for detection in self.detections(frame, seq, captured_at):
+                    self.position = detection.position
+                    self.detect_stats.add(detection.captured_at)
+                    self.move_robot(detection.position, detection.area, detection.frame, detection.captured_at)
+                    if self.log is not None:
+                        self.log.append((detection.seq, detection.captured_at, detection.detect_time,
+                                         time.monotonic(), detection.position))
+
+                    if time.monotonic() - last_report >= 1.0:
+                        self.report()
+                        last_report = time.monotonic()
+
+                    if not self.headless:
+                        if self.position:
+                            cv2.circle(detection.frame, self.position, 10, (0, 255, 0), -1)  # Mark the object
+                        # Display the frame
+                        cv2.imshow("Object Tracking", detection.frame)
+
+                # Exit on 'q' key press
+                if not self.headless and cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            if self.pool is not None:
+                self.pool.close()
+            self.capture.release()
+            if not self.headless:
+                cv2.destroyAllWindows()
+
+    def move_robot(self, position, area, frame, captured_at):
+        """Steer the robot towards the object's position, without waiting for the move."""
+        height, width = frame.shape[:2]
+        self.servo.update(position, area, (width, height), captured_at)
+
+def frame_source(argv):
+    # Capture from the command line: --url URL, --video PATH, --images DIR, --synthetic, or the first camera
+    def value(flag):
+        return argv[argv.index(flag) + 1]
+
+    if "--url" in argv:
+        return MJPEGStream(value("--url"))  # e.g. http://<esp32-ip>:81/stream
+    if "--video" in argv:
+        return VideoFileSource(value("--video"))
+    if "--images" in argv:
+        return ImageDirSource(value("--images"))
+    if "--synthetic" in argv:
+        return SyntheticBlobSource()
+    return None
 
-        self.capture.release()
-        cv2.destroyAllWindows()
-
-    def move_robot(self, position):
-        """Move the robot based on the object's position."""
-        x, y = position
-        cx, cy = self.frame_center
-
-        # Horizontal movement
-        if x < cx - self.threshold:
-            print("Object to the left, turning left")
-            self.robot.body_left(5)  # Adjust step size
-        elif x > cx + self.threshold:
-            print("Object to the right, turning right")
-            self.robot.body_right(5)  # Adjust step size
-
-        # Forward/backward movement
-        if y < cy - self.threshold:
-            print("Object above, moving forward")
-            self.robot.step_forward(1)  # Adjust step size
-        elif y > cy + self.threshold:
-            print("Object below, moving backward")
-            self.robot.step_back(1)  # Adjust step size
 
 if __name__ == "__main__":
-    tracker = ObjectTracker()
+    # --workers N runs detection in N processes, --headless runs without a preview window
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else 0
+    tracker = ObjectTracker(capture=frame_source(sys.argv), workers=workers, headless="--headless" in sys.argv)
     tracker.track_object()
-S
@@ -0,0 +1,169 @@
+import functools
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+from atomic_file import atomic_write
+from batch_ik import SERVO_MAX, SERVO_MIN, SERVO_OFFSET, SERVO_SIGN, leg_angles
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reach_cache")
+VERSION = 1  # Bump when the grid layout, the reachability test or the nearest-cell search changes
+
+# Cell states
+OUT, EDGE, IN = 0, 1, 2
+
+
+def joint_ranges(leg):
+    # (low, high) joint angle in degrees for each of alpha, beta, gamma allowed by the servo limits
+    low = (SERVO_MIN - SERVO_OFFSET[leg]) / SERVO_SIGN[leg]
+    high = (SERVO_MAX - SERVO_OFFSET[leg]) / SERVO_SIGN[leg]
+    return np.minimum(low, high), np.maximum(low, high)
+
+
+def nearest_inside(inside):
+    """(rows, cols, 2) index of the nearest True cell of a 2D mask, Euclidean, for every cell.
+
+    An exact separable distance transform: first the nearest True cell
+    along each row, then for every cell the best of those over all rows,
+    which is one (rows, cols) array operation per row instead of a search
+    over every pair of cells.
+    """
+    rows, cols = inside.shape
+    index = np.arange(cols)
+    # Nearest True column at or before / at or after each cell, within its own row
+    before = np.maximum.accumulate(np.where(inside, index, -cols), axis=1)
+    after = np.minimum.accumulate(np.where(inside, index, 2 * cols)[:, ::-1], axis=1)[:, ::-1]
+    column = np.where(index - before <= after - index, before, after)
+    gap = np.abs(index - column).astype(np.float64)
+    gap[~inside.any(axis=1)] = np.inf
+    gap2 = gap * gap
+    row_offset2 = (np.arange(rows)[:, None] - np.arange(rows)[None, :]) ** 2.0
+    nearest = np.empty((rows, cols, 2), dtype=np.int16)
+    for i in range(rows):
+        best = (row_offset2[i][:, None] + gap2).argmin(axis=0)
+        nearest[i, :, 0] = best
+        nearest[i, :, 1] = column[best, index]
+    return nearest
+
+
+class ReachabilityMap:
+    """Which foot positions each leg can reach, precomputed on a grid.
+
+    The coxa servo swings the rest of the leg around z, so apart from the
+    coxa's own azimuth limit, reach only depends on rho = hypot(x, y) and
+    z. Each leg gets a 2D (rho, z) grid: IN cells have every corner within
+    the joint limits, EDGE cells only some, OUT cells none. Every cell also
+    stores the nearest IN cell. contains() and project() are then an
+    azimuth check plus one lookup, with exact trigonometry only for EDGE
+    cells, and that is guarded so it never fails.
+    """
+
+    def __init__(self, length_a, length_b, length_c, resolution=1.0):
+        self.length_a = length_a
+        self.length_b = length_b
+        self.length_c = length_c
+        self.resolution = resolution
+        self.rho_max = length_a + length_b + length_c
+        self.z_max = length_a + length_b
+        self.shape = (int(math.ceil(self.rho_max / resolution)) + 1,
+                      int(math.ceil(2 * self.z_max / resolution)) + 1)
+        self.ranges = [joint_ranges(leg) for leg in range(4)]
+        self.azimuth = [tuple(math.radians(v) for v in (low[2], high[2])) for low, high in self.ranges]
+        self.cells = None  # (4, rho cells, z cells) uint8 state
+        self.nearest = None  # (4, rho cells, z cells, 2) int16 index of the nearest IN cell
+
+    def key(self):
+        # Hash of everything the grid depends on
+        blob = json.dumps([VERSION, self.length_a, self.length_b, self.length_c, self.resolution,
+                           SERVO_SIGN.tolist(), SERVO_OFFSET.tolist(), SERVO_MIN, SERVO_MAX])
+        return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+    def solvable(self, leg, rho, z):
+        # Can the leg put its foot at (rho, z) with every joint in range? Floats, or arrays elementwise
+        alpha, beta, reachable = leg_angles(rho - self.length_c, z, self.length_a, self.length_b)
+        alpha, beta = np.degrees(alpha), np.degrees(beta)
+        low, high = self.ranges[leg]
+        return reachable & (alpha >= low[0]) & (alpha <= high[0]) & (beta >= low[1]) & (beta <= high[1])
+
+    def build(self):
+        res = self.resolution
+        rho_cells, z_cells = self.shape
+        # Cell (i, j) is centered on rho = i * res, z = j * res - z_max; corners sit half a cell off
+        rho = np.maximum((np.arange(rho_cells + 1) - 0.5) * res, 0.0)
+        z = (np.arange(z_cells + 1) - 0.5) * res - self.z_max
+        self.cells = np.zeros((4, rho_cells, z_cells), dtype=np.uint8)
+        self.nearest = np.zeros((4, rho_cells, z_cells, 2), dtype=np.int16)
+        built = {}  # Joint limits -> leg already built with them; mirrored legs share one workspace
+        for leg in range(4):
+            limits = tuple(np.concatenate(self.ranges[leg]))
+            if limits in built:
+                self.cells[leg], self.nearest[leg] = self.cells[built[limits]], self.nearest[built[limits]]
+                continue
+            built[limits] = leg
+            corners = self.solvable(leg, rho[:, None], z[None, :]).astype(np.uint8)
+            count = corners[:-1, :-1] + corners[1:, :-1] + corners[:-1, 1:] + corners[1:, 1:]
+            cells = np.where(count == 4, IN, np.where(count > 0, EDGE, OUT)).astype(np.uint8)
+            self.cells[leg] = cells
+            self.nearest[leg] = nearest_inside(cells == IN)
+        return self
+
+    def save(self, path):
+        # Both arrays back to back in one .npy stream; loading skips zipfile, a noticeable import at startup
+        with atomic_write(path) as f:
+            np.save(f, self.cells)
+            np.save(f, self.nearest)
+
+    def load(self, path):
+        with open(path, "rb") as f:
+            self.cells, self.nearest = np.load(f), np.load(f)
+        return self
+
+    def cell(self, rho, z):
+        # Grid cell holding (rho, z), clamped to the grid
+        i = min(int(rho / self.resolution + 0.5), self.shape[0] - 1)
+        j = min(max(int((z + self.z_max) / self.resolution + 0.5), 0), self.shape[1] - 1)
+        return i, j
+
+    def contains(self, leg, site):
+        """True if the leg can reach `site` (x, y, z) with every servo in range."""
+        x, y, z = site
+        low, high = self.azimuth[leg]
+        if not low <= math.atan2(y, x) <= high:
+            return False
+        rho = math.hypot(x, y)
+        if rho > self.rho_max or abs(z) > self.z_max:
+            return False
+        state = self.cells[leg][self.cell(rho, z)]
+        return state == IN or (state == EDGE and bool(self.solvable(leg, rho, z)))
+
+    def project(self, leg, site):
+        """`site` if it's reachable, otherwise the nearest reachable point (to within a grid cell)."""
+        if self.contains(leg, site):
+            return site
+        x, y, z = site
+        low, high = self.azimuth[leg]
+        azimuth = min(max(math.atan2(y, x), low), high)
+        rho = math.hypot(x, y)
+        i, j = self.cell(rho, z)
+        state = self.cells[leg][i, j] if rho <= self.rho_max and abs(z) <= self.z_max else OUT
+        if not (state == IN or (state == EDGE and self.solvable(leg, rho, z))):
+            # Out of reach at any azimuth: move to the nearest cell that is fully inside
+            i, j = self.nearest[leg][i, j]
+            rho, z = i * self.resolution, j * self.resolution - self.z_max
+        return rho * math.cos(azimuth), rho * math.sin(azimuth), z
+
+
+@functools.lru_cache(maxsize=None)
+def reachability_map(length_a, length_b, length_c, resolution=1.0, cache_dir=CACHE_DIR):
+    """The ReachabilityMap for these leg lengths, from the disk cache or built (and cached) on first use."""
+    reach = ReachabilityMap(length_a, length_b, length_c, resolution)
+    path = os.path.join(cache_dir, f"reach-{reach.key()}.npy")
+    if os.path.exists(path):
+        return reach.load(path)
+    reach.build()
+    os.makedirs(cache_dir, exist_ok=True)
+    reach.save(path)
+    return reach
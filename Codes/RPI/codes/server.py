@@ -1,30 +1,42 @@
-from flask import Flask, render_template, request, jsonify
+import startup  # First, so the startup report counts the time spent importing everything else
+import os
+
+from flask import Flask, Response, render_template, request, jsonify
 from kinematics import RobotKinematics  # Import your robot library
-import threading
-import time
+from servo_backend import PCA9685Backend, SimServoBackend
+from gait import VelocityGait
+from gait_compiler import GaitCompiler
+from motion_executor import MotionExecutor
+from telemetry import prometheus
 
 app = Flask(__name__)
-robot = RobotKinematics()  # Initialize your robot object
-
-# Variable to control the looping command
-current_command = None
-looping_thread = None
-command_running = False  # Flag to control the loop
+if os.environ.get("LEGION_SIM"):
+    backend = SimServoBackend()  # No board attached, e.g. for benchmarks
+else:
+    backend = PCA9685Backend()  # Servo output layer, shared with anything else driving the board
+robot = RobotKinematics(backend=backend)  # Initialize your robot object
 
+# Continuous gait driven by the held direction button
+gait = VelocityGait(robot)
+WALK_SPEED = 40.0  # mm/s
+TURN_RATE = 0.4  # rad/s
+VELOCITY_COMMANDS = {
+    "forward": (0.0, WALK_SPEED, 0.0),
+    "backward": (0.0, -WALK_SPEED, 0.0),
+    "left": (0.0, 0.0, TURN_RATE),
+    "right": (0.0, 0.0, -TURN_RATE),
+}
 
-# Function to execute looping commands
-def command_loop():
-    global command_running
-    while command_running:
-        if current_command == "forward":
-            robot.step_forward(1)
-        elif current_command == "backward":
-            robot.step_back(1)
-        elif current_command == "left":
-            robot.turn_left(1)
-        elif current_command == "right":
-            robot.turn_right(1)
-        time.sleep(0.1)  # Adjust the delay as needed
+# One-time motions, run by the executor so request handlers return immediately.
+# They play precompiled gait tables, compiled on first use from each start pose and cached on disk.
+compiler = GaitCompiler(robot)
+MOTIONS = {
+    "handshake": (compiler.run, "hand_shake", 3),
+    "handwave": (compiler.run, "hand_wave", 3),
+    "sit": (compiler.run, "sit"),
+    "dance": (compiler.run, "body_dance", 5),
+}
+executor = MotionExecutor(robot, gait)
 
 
 @app.route('/')
@@ -32,45 +44,56 @@ def home():
     return render_template('index.html')  # Serve the control interface
 
 
+def dispatch(command):
+    # Hand a UI command to the executor; returns False for unknown commands
+
+    # Handle start of continuous commands, changed mid-stride without stopping
+    if command in VELOCITY_COMMANDS:
+        executor.drive(*VELOCITY_COMMANDS[command])
+
+    # Handle stop command, preempts whatever is running
+    elif command == "stop":
+        executor.stop()
+
+    # Handle one-time commands
+    elif command in MOTIONS:
+        action, *args = MOTIONS[command]
+        executor.submit(command, action, *args)
+    else:
+        return False
+    return True
+
+
 @app.route('/command', methods=['POST'])
 def handle_command():
-    global current_command, command_running, looping_thread
-    data = request.json
-    command = data.get('action', '')
-    if command:
-        print(f"Received command: {command}")
-        
-        # Handle start of continuous commands
-        if command in ["forward", "backward", "left", "right"]:
-            if current_command != command:
-                # Update the current command and start looping
-                current_command = command
-                if not command_running:
-                    command_running = True
-                    looping_thread = threading.Thread(target=command_loop)
-                    looping_thread.start()
-        
-        # Handle stop command
-        elif command == "stop":
-            command_running = False  # Stop the loop
-            current_command = None
-            robot.stand()  # Example for stopping
-            
-        # Handle one-time commands
-        elif command == "handshake":
-            robot.hand_shake(3)
-        elif command == "handwave":
-            robot.hand_wave(3)
-        elif command == "sit":
-            robot.sit()
-        elif command == "dance":
-            robot.body_dance(5)
-        
-        return jsonify({"status": "success"}), 200
-    return jsonify({"status": "error"}), 400
+    data = request.get_json(silent=True)
+    command = data.get('action', '') if isinstance(data, dict) else ''
+    if not isinstance(command, str) or not command:
+        return jsonify({"status": "error"}), 400
+    print(f"Received command: {command}")
+    if not dispatch(command):
+        return jsonify({"status": "error", "error": "unknown command"}), 400
+    return jsonify({"status": "success", "queue_depth": executor.stats()["queue_depth"]}), 200
+
+
+@app.route('/executor')
+def executor_stats():
+    return jsonify(executor.stats())
+
+
+@app.route('/metrics')
+def metrics():
+    # Servo loop telemetry for Prometheus
+    return Response(prometheus(robot.telemetry, robot.loop), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/telemetry.bin')
+def telemetry_dump():
+    # Raw tick records for offline analysis, read back with telemetry.load_dump
+    return Response(robot.telemetry.to_bytes(), mimetype='application/octet-stream')
 
 
 if __name__ == '__main__':
-    # Setup robot in a separate thread to avoid blocking
-    threading.Thread(target=lambda: (robot.setup(), robot.stand()), daemon=True).start()
+    # Setup robot on the executor to avoid blocking
+    executor.submit("setup", lambda: (robot.setup(), robot.stand()))
     app.run(host='0.0.0.0', port=5000)
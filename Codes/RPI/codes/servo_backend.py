@@ -0,0 +1,221 @@
+import time
+
+import numpy as np
+
+from clock import RealClock
+
+# PCA9685 registers
+MODE1 = 0x00
+PRESCALE = 0xFE
+LED0_ON_L = 0x06
+MODE1_SLEEP = 0x10
+MODE1_AI = 0x20  # Register auto-increment, lets one transaction cover many channels
+MODE1_RESTART = 0x80
+OSC_HZ = 25_000_000
+
+
+class ServoBackend:
+    """Servo output layer shared by RobotKinematics, Servo_config.py and server.py.
+
+    Angles are converted to PCA9685 tick counts and compared with the last
+    value sent to each channel. Channels that moved less than `deadband`
+    degrees (or to the same tick count) are skipped, and the remaining ones go
+    out as one contiguous register block. Subclasses implement `send`.
+    With `deferred` set, writes only update the channel state and flush()
+    sends everything changed since the last flush as one block, so a Fleet
+    can put all its boards' writes into one pass over the bus.
+    """
+
+    def __init__(self, channels=16, frequency=50, min_pulse=750, max_pulse=2250,
+                 actuation_range=180, deadband=0.5):
+        self.channels = channels
+        self.frequency = frequency
+        self.min_pulse = min_pulse  # Microseconds, same defaults as adafruit_servokit
+        self.max_pulse = max_pulse
+        self.actuation_range = actuation_range
+        self.deadband = deadband
+        self.last_angle = np.full(channels, np.nan)
+        self.last_count = np.zeros(channels, dtype=np.int64)  # 0 = output off
+        self.deferred = False
+        self.dirty = None  # (first, last) channels changed since the last flush, when deferred
+        self.transactions = 0
+        self.bytes_sent = 0
+        self.started = time.monotonic()
+
+    def angle_to_count(self, angles):
+        # Servo angles to 12-bit PWM off counts
+        pulse = self.min_pulse + (self.max_pulse - self.min_pulse) * np.asarray(angles, dtype=np.float64) / self.actuation_range
+        return np.rint(pulse * self.frequency * 4096 / 1e6).astype(np.int64)
+
+    def write(self, channels, angles):
+        # Send `angles` to `channels`, skipping channels that haven't moved
+        channels = np.asarray(channels, dtype=np.int64)
+        angles = np.asarray(angles, dtype=np.float64)
+        if np.any(~((angles >= 0) & (angles <= self.actuation_range))):
+            raise ValueError(f"Servo angle out of range: {angles}")
+
+        counts = self.angle_to_count(angles)
+        moved = ~(np.abs(angles - self.last_angle[channels]) < self.deadband)
+        changed = moved & (counts != self.last_count[channels])
+        if not changed.any():
+            return
+
+        channels, angles, counts = channels[changed], angles[changed], counts[changed]
+        self.last_angle[channels] = angles
+        self.last_count[channels] = counts
+
+        first, last = int(channels.min()), int(channels.max())
+        if self.deferred:
+            if self.dirty is not None:
+                first, last = min(first, self.dirty[0]), max(last, self.dirty[1])
+            self.dirty = (first, last)
+            return
+        self.send(first, self.last_count[first:last + 1])
+
+    def flush(self):
+        # Send the channels deferred writes changed, as one block; returns True if anything went out
+        if self.dirty is None:
+            return False
+        first, last = self.dirty
+        self.dirty = None
+        self.send(first, self.last_count[first:last + 1])
+        return True
+
+    def set_angle(self, channel, angle):
+        self.write([channel], [angle])
+
+    def home(self, channels, angles, rate=360.0, burst=4, interval=0.02, clock=None):
+        """Move `channels` to `angles` together without yanking every servo at once.
+
+        Channels with a known last angle ramp at up to `rate` degrees per
+        second. Channels never written since power-up are at an unknown
+        position and can't be ramped, so at most `burst` of them are switched
+        on per step. Each step is one block write, `interval` seconds apart.
+        Returns the number of steps.
+        """
+        clock = clock if clock is not None else RealClock()
+        channels = np.asarray(channels, dtype=np.int64)
+        target = np.asarray(angles, dtype=np.float64)
+        position = self.last_angle[channels].copy()
+        unknown = np.flatnonzero(np.isnan(position))
+        step = rate * interval
+        steps = 0
+        while True:
+            # Bound the inrush: only a few servos start from an unknown position per step
+            position[unknown[:burst]] = target[unknown[:burst]]
+            unknown = unknown[burst:]
+            known = ~np.isnan(position)
+            position[known] += np.clip(target[known] - position[known], -step, step)
+            self.write(channels[known], position[known])
+            steps += 1
+            if not unknown.size and np.array_equal(position, target):
+                return steps
+            clock.sleep(interval)
+
+    def open(self):
+        # Connect to the board; backends that need it do so on first use
+        pass
+
+    def send(self, first, counts):
+        # Write `counts` to channels first..first+len(counts)-1 in one bus transaction
+        raise NotImplementedError
+
+    def count_transaction(self, nbytes):
+        self.transactions += 1
+        self.bytes_sent += nbytes
+
+    def stats(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "transactions": self.transactions,
+            "bytes": self.bytes_sent,
+            "transactions_per_s": self.transactions / elapsed,
+            "bytes_per_s": self.bytes_sent / elapsed,
+        }
+
+    def deinit(self):
+        pass
+
+
+class SimServoBackend(ServoBackend):
+    """In-memory PCA9685 that records every commanded angle instead of driving servos."""
+
+    def __init__(self, clock=None, **kwargs):
+        super().__init__(**kwargs)
+        self.clock = clock if clock is not None else RealClock()
+        self.times = []
+        self.frames = []  # Angle of every channel after each bus transaction
+
+    def send(self, first, counts):
+        self.times.append(self.clock.now())
+        self.frames.append(self.last_angle.copy())
+        self.count_transaction(1 + 4 * len(counts) + 1)
+
+    def stream(self, channel=None):
+        # (times, angles) of the recorded writes, for one channel or all of them
+        times = np.array(self.times)
+        angles = np.array(self.frames).reshape(-1, self.channels)
+        return times, angles if channel is None else angles[:, channel]
+
+
+class PCA9685Backend(ServoBackend):
+    """Talks to the PCA9685 registers directly over I2C.
+
+    The bus and the Blinka hardware modules are only touched on the first
+    write (or an explicit open()), so creating the backend is free and code
+    that never drives the servos doesn't pay for I2C setup.
+    """
+
+    def __init__(self, address=0x40, i2c=None, **kwargs):
+        super().__init__(**kwargs)
+        self.address = address
+        self.i2c = i2c
+        self.device = None
+
+    def open(self):
+        if self.device is not None:
+            return
+        from adafruit_bus_device.i2c_device import I2CDevice
+
+        if self.i2c is None:
+            import board
+            import busio
+
+            self.i2c = busio.I2C(board.SCL, board.SDA)
+        self.device = I2CDevice(self.i2c, self.address)
+        self.set_frequency(self.frequency)
+
+    def write_reg(self, reg, value):
+        self.open()
+        with self.device as device:
+            device.write(bytes([reg, value]))
+        self.count_transaction(3)
+
+    def set_frequency(self, frequency):
+        # The prescaler can only be changed while the oscillator is asleep
+        prescale = round(OSC_HZ / (4096 * frequency)) - 1
+        self.write_reg(MODE1, MODE1_SLEEP)
+        self.write_reg(PRESCALE, prescale)
+        self.write_reg(MODE1, MODE1_AI)
+        time.sleep(0.0005)
+        self.write_reg(MODE1, MODE1_AI | MODE1_RESTART)
+        self.frequency = frequency
+
+    def send(self, first, counts):
+        buf = bytearray(1 + 4 * len(counts))
+        buf[0] = LED0_ON_L + 4 * first
+        for i, count in enumerate(counts):
+            # ON at tick 0, OFF at `count`
+            buf[3 + 4 * i] = count & 0xFF
+            buf[4 + 4 * i] = (count >> 8) & 0x0F
+        self.open()
+        with self.device as device:
+            device.write(buf)
+        self.count_transaction(len(buf) + 1)  # +1 for the address byte
+
+    def deinit(self):
+        # Turn every output off and release the bus, if it was ever opened
+        if self.device is None:
+            return
+        self.send(0, [0] * self.channels)
+        self.i2c.deinit()
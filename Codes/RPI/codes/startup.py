@@ -0,0 +1,26 @@
+import time
+
+# Taken when this module is first imported; entry points import it first so it's close to process start
+PROCESS_START = time.monotonic()
+
+
+class StartupTimer:
+    """Wall time of each boot phase, from process start to standing."""
+
+    def __init__(self, start=PROCESS_START):
+        self.start = start
+        self.last = start
+        self.phases = {}  # Phase name -> seconds, in order
+
+    def mark(self, phase):
+        # End the current phase, named `phase`, and start the next one
+        now = time.monotonic()
+        self.phases[phase] = now - self.last
+        self.last = now
+
+    def total(self):
+        return self.last - self.start
+
+    def report(self):
+        phases = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items())
+        return f"Startup {self.total() * 1000:.0f} ms: {phases}"
@@ -0,0 +1,153 @@
+import math
+
+
+class AxisFilter:
+    """Constant-velocity Kalman filter for one coordinate, state (value, rate)."""
+
+    def __init__(self, value, noise, accel, rate_std):
+        self.value = value
+        self.rate = 0.0
+        self.p00, self.p01, self.p11 = noise * noise, 0.0, rate_std * rate_std  # Covariance
+        self.r = noise * noise  # Measurement noise
+        self.q = accel * accel  # White acceleration process noise
+
+    def predict(self, dt):
+        self.value += self.rate * dt
+        q = self.q
+        p00, p01, p11 = self.p00, self.p01, self.p11
+        self.p00 = p00 + 2 * dt * p01 + dt * dt * p11 + q * dt ** 4 / 4
+        self.p01 = p01 + dt * p11 + q * dt ** 3 / 2
+        self.p11 = p11 + q * dt * dt
+
+    def update(self, measured):
+        s = self.p00 + self.r
+        k0, k1 = self.p00 / s, self.p01 / s
+        residual = measured - self.value
+        self.value += k0 * residual
+        self.rate += k1 * residual
+        p00, p01, p11 = self.p00, self.p01, self.p11
+        self.p00, self.p01, self.p11 = (1 - k0) * p00, (1 - k0) * p01, p11 - k1 * p01
+
+
+class KalmanFilter:
+    """Constant-velocity Kalman estimate of a target's (x, y, size) in pixels.
+
+    `size` is the square root of the blob area, which changes about linearly
+    with distance. The axes don't interact under this model, so each is its
+    own 2-state filter in plain floats, much cheaper than 6x6 matrix math.
+    """
+
+    def __init__(self, position, size, accel=400.0, size_accel=100.0, noise=2.0, size_noise=2.0):
+        self.axes = (AxisFilter(position[0], noise, accel, 200.0), AxisFilter(position[1], noise, accel, 200.0),
+                     AxisFilter(size, size_noise, size_accel, 50.0))
+
+    def predict(self, dt):
+        if dt > 0:
+            for axis in self.axes:
+                axis.predict(dt)
+
+    def update(self, position, size):
+        for axis, measured in zip(self.axes, (position[0], position[1], size)):
+            axis.update(measured)
+
+    def state(self):
+        return tuple(axis.value for axis in self.axes)
+
+    def uncertainty(self):
+        # 1-sigma position error in pixels
+        return math.sqrt(self.axes[0].p00 + self.axes[1].p00)
+
+
+class TargetTracker:
+    """Kalman-smoothed target track on top of a ColorDetector.
+
+    A full-frame detection runs every `full_every` frames (a second at 30
+    fps), or sooner when the position uncertainty grows past
+    `max_uncertainty` pixels. In between only a window around the predicted
+    position is searched. Misses are bridged by prediction for up to
+    `max_coast` seconds before the target counts as lost, so a dropped frame
+    doesn't stop the robot. While coasting every frame gets a full search,
+    since the window around a prediction with no fresh measurement behind it
+    has just missed.
+    """
+
+    def __init__(self, detector, full_every=30, max_uncertainty=25.0, max_coast=0.5, roi_scale=1.5):
+        self.detector = detector
+        self.full_every = full_every
+        self.max_uncertainty = max_uncertainty
+        self.max_coast = max_coast
+        self.roi_scale = roi_scale  # ROI half-width in target sizes, plus the position uncertainty
+        self.filter = None
+        self.last_time = None
+        self.last_seen = None
+        self.since_full = 0
+        self.position = None
+        self.area = 0.0
+        self.coasting = False  # The last frame missed and the position is predicted only
+        self.full_detections = 0
+        self.roi_checks = 0
+        self.coasted = 0
+
+    def predicted_roi(self):
+        x, y, size = self.filter.state()
+        half = self.roi_scale * size + 2 * self.filter.uncertainty()
+        return x - half, y - half, x + half, y + half
+
+    def update(self, frame, now):
+        """Estimated (x, y) of the target in this frame, or None once it's lost."""
+        self.predict(now)
+        found = None
+        full = (self.filter is None or self.coasting or self.since_full + 1 >= self.full_every
+                or self.filter.uncertainty() > self.max_uncertainty)
+        if not full:
+            self.roi_checks += 1
+            self.since_full += 1
+            found = self.detector.find(frame, self.predicted_roi())
+            full = found is None  # Fall back to a full search on a miss
+        if full:
+            self.full_detections += 1
+            self.since_full = 0
+            found = self.detector.find(frame)
+        position = found[0] if found is not None else None
+        return self.correct(position, self.detector.area, now)
+
+    def observe(self, position, area, now):
+        """Filter a detection made elsewhere (e.g. in a worker process); same result as update()."""
+        self.predict(now)
+        return self.correct(position, area, now)
+
+    def predict(self, now):
+        if self.filter is not None:
+            self.filter.predict(now - self.last_time)
+        self.last_time = now
+
+    def correct(self, position, area, now):
+        if position is not None:
+            size = math.sqrt(area)
+            if self.filter is None:
+                self.filter = KalmanFilter(position, size)
+            else:
+                self.filter.update(position, size)
+            self.last_seen = now
+            self.coasting = False
+        elif self.filter is None or now - self.last_seen > self.max_coast:
+            self.reset()
+            return None
+        else:
+            self.coasted += 1
+            self.coasting = True
+        x, y, size = self.filter.state()
+        self.position = (int(round(x)), int(round(y)))
+        self.area = max(size, 0.0) ** 2
+        return self.position
+
+    def reset(self):
+        self.filter = None
+        self.position = None
+        self.area = 0.0
+        self.coasting = False
+        self.since_full = 0
+
+    def stats(self):
+        return {"full_detections": self.full_detections, "roi_checks": self.roi_checks, "coasted": self.coasted,
+                "uncertainty_px": self.filter.uncertainty() if self.filter is not None else None}
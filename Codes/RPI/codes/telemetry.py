@@ -0,0 +1,128 @@
+import struct
+
+import numpy as np
+
+# Binary dump: header, then `count` packed records oldest first
+DUMP_MAGIC = b"LGTM"
+DUMP_VERSION = 1
+DUMP_HEADER = struct.Struct("<4sHHI")  # magic, version, record size, count
+RECORD = np.dtype([
+    ("t", "<f8"),  # Clock time of the tick, s
+    ("compute", "<f4"),  # Tick compute time, s
+    ("sites", "<f4", (4, 3)),  # site_now after the tick, mm
+    ("angles", "<f4", (4, 3)),  # Servo angles written, degrees
+    ("clamped", "u1", (4, 3)),  # 1 where the IK had to clip the joint to the servo range
+])
+
+JOINTS = ("alpha", "beta", "gamma")
+AXES = ("x", "y", "z")
+
+
+class TelemetryRing:
+    """Preallocated ring of the last `size` servo ticks.
+
+    record() only copies into fixed arrays, so it allocates nothing and costs
+    a few microseconds per tick. Clamp counts are also kept as running totals
+    so they survive the ring wrapping.
+    """
+
+    def __init__(self, size=3000):
+        self.size = size
+        self.times = np.zeros(size)
+        self.compute = np.zeros(size)
+        self.sites = np.zeros((size, 4, 3))
+        self.angles = np.zeros((size, 4, 3))
+        self.clamped = np.zeros((size, 4, 3), dtype=bool)
+        self.clamp_total = np.zeros((4, 3), dtype=np.int64)
+        self.count = 0
+
+    def record(self, t, compute, sites, angles, clamped=None):
+        # `clamped` is the mask BatchIK.solve_into filled; None for ticks it didn't solve (gait tables)
+        i = self.count % self.size
+        self.times[i] = t
+        self.compute[i] = compute
+        self.sites[i] = sites
+        self.angles[i] = angles
+        if clamped is None:
+            self.clamped[i] = False
+        else:
+            self.clamped[i] = clamped
+            self.clamp_total += clamped
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def order(self):
+        # Ring indices from oldest to newest
+        if self.count <= self.size:
+            return np.arange(self.count)
+        return np.arange(self.count, self.count + self.size) % self.size
+
+    def records(self):
+        # Copy of the buffered ticks as packed records, oldest first
+        index = self.order()
+        out = np.empty(len(index), dtype=RECORD)
+        out["t"] = self.times[index]
+        out["compute"] = self.compute[index]
+        out["sites"] = self.sites[index]
+        out["angles"] = self.angles[index]
+        out["clamped"] = self.clamped[index]
+        return out
+
+    def to_bytes(self):
+        records = self.records()
+        return DUMP_HEADER.pack(DUMP_MAGIC, DUMP_VERSION, RECORD.itemsize, len(records)) + records.tobytes()
+
+    def dump(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+
+def load_dump(path):
+    # Read a dump written by TelemetryRing.dump back into packed records
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, size, count = DUMP_HEADER.unpack_from(data)
+    if magic != DUMP_MAGIC or version != DUMP_VERSION or size != RECORD.itemsize:
+        raise ValueError(f"Not a version {DUMP_VERSION} telemetry dump: {path}")
+    return np.frombuffer(data, dtype=RECORD, count=count, offset=DUMP_HEADER.size)
+
+
+def prometheus(telemetry, loop):
+    # Telemetry and control loop stats in the Prometheus text exposition format
+    stats = loop.stats()
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{labels} {float(value):g}")
+
+    metric("legion_ticks_total", "counter", "Servo ticks run.", [("", telemetry.count)])
+    metric("legion_tick_overruns_total", "counter", "Ticks that finished past their deadline.",
+           [("", stats["overruns"])])
+    metric("legion_tick_skipped_total", "counter", "Whole periods skipped after overruns.",
+           [("", stats["skipped_ticks"])])
+    metric("legion_control_rate_hz", "gauge", "Servo loop rate.", [("", stats["rate_hz"])])
+
+    n = len(telemetry)
+    compute = telemetry.compute[:n] if n else np.zeros(1)
+    quantiles = [(f'{{quantile="{q}"}}', np.quantile(compute, q)) for q in (0.5, 0.9, 0.99, 1.0)]
+    metric("legion_tick_compute_seconds", "summary", f"Tick compute time over the last {n} ticks.",
+           quantiles + [("_sum", compute.sum()), ("_count", n)])
+
+    metric("legion_servo_clamp_total", "counter", "Ticks a joint was clamped to the servo range.",
+           [(f'{{leg="{leg}",joint="{JOINTS[j]}"}}', telemetry.clamp_total[leg, j])
+            for leg in range(4) for j in range(3)])
+
+    if n:
+        last = (telemetry.count - 1) % telemetry.size
+        metric("legion_foot_position_mm", "gauge", "Foot position at the last tick.",
+               [(f'{{leg="{leg}",axis="{AXES[a]}"}}', telemetry.sites[last, leg, a])
+                for leg in range(4) for a in range(3)])
+        metric("legion_servo_angle_degrees", "gauge", "Servo angle written at the last tick.",
+               [(f'{{leg="{leg}",joint="{JOINTS[j]}"}}', telemetry.angles[last, leg, j])
+                for leg in range(4) for j in range(3)])
+    return "\n".join(lines) + "\n"
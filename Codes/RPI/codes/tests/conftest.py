@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The robot code is a flat set of modules one directory up, imported by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+
+from batch_ik import SERVO_MAX, SERVO_MIN, SERVO_OFFSET, SERVO_SIGN, BatchIK, leg_angles
+
+LENGTH_A, LENGTH_B, LENGTH_C = 55.0, 77.5, 27.5
+
+
+def random_sites(n, seed=0):
+    # Reachable foot positions around the standing pose
+    rng = np.random.default_rng(seed)
+    return np.stack((rng.uniform(40.0, 90.0, n), rng.uniform(-20.0, 80.0, n), rng.uniform(-60.0, -20.0, n)), axis=-1)
+
+
+def forward(alpha, beta, gamma):
+    # Foot position of joint angles in degrees, the inverse of cartesian_to_polar
+    alpha, beta, gamma = math.radians(alpha), math.radians(beta), math.radians(gamma)
+    v = LENGTH_A * math.cos(alpha) + LENGTH_B * math.cos(alpha + beta - math.pi)
+    z = LENGTH_A * math.sin(alpha) + LENGTH_B * math.sin(alpha + beta - math.pi)
+    rho = v + LENGTH_C
+    return rho * math.cos(gamma), rho * math.sin(gamma), z
+
+
+def scalar_ik(x, y, z, leg):
+    # Servo angles of one leg, mirrored the way polar_to_servo did before BatchIK
+    alpha, beta, _ = leg_angles(math.hypot(x, y) - LENGTH_C, z, LENGTH_A, LENGTH_B)
+    alpha, beta, gamma = math.degrees(alpha), math.degrees(beta), math.degrees(math.atan2(y, x))
+    if leg in (1, 2):
+        alpha, beta, gamma = alpha + 90, 180 - beta, 90 - gamma
+    else:
+        alpha, beta, gamma = 90 - alpha, beta, gamma + 90
+    return [min(max(angle, 0.0), 180.0) for angle in (alpha, beta, gamma)]
+
+
+def test_cartesian_to_polar_inverts_forward_kinematics():
+    ik = BatchIK(LENGTH_A, LENGTH_B, LENGTH_C)
+    sites = random_sites(200)
+    for site, polar in zip(sites, ik.cartesian_to_polar(sites)):
+        assert np.allclose(forward(*polar), site)
+
+
+def test_batch_matches_scalar_ik():
+    ik = BatchIK(LENGTH_A, LENGTH_B, LENGTH_C)
+    sites = random_sites(400)
+    legs = np.arange(len(sites)) % 4
+    expected = [scalar_ik(*site, leg) for site, leg in zip(sites.tolist(), legs)]
+    assert np.allclose(ik.solve(sites, legs), expected)
+
+
+def test_tick_and_batch_paths_agree():
+    ik = BatchIK(LENGTH_A, LENGTH_B, LENGTH_C)
+    poses = random_sites(40).reshape(10, 4, 3)
+    out = np.empty((4, 3))
+    for pose in poses:
+        assert np.allclose(ik.solve_into(pose, out), ik.solve(pose))
+    batch = np.empty_like(poses)
+    assert np.allclose(ik.solve_into(poses, batch), ik.solve(poses))
+
+
+def test_leg_angles_floats_and_arrays_agree():
+    v = np.array([20.0, 60.0, 200.0, 0.0])
+    z = np.array([-50.0, 10.0, 0.0, 0.0])
+    alpha, beta, reachable = leg_angles(v, z, LENGTH_A, LENGTH_B)
+    for i in range(len(v)):
+        assert np.allclose(leg_angles(float(v[i]), float(z[i]), LENGTH_A, LENGTH_B), (alpha[i], beta[i], reachable[i]))
+    assert reachable.tolist() == [True, True, False, False]
+
+
+def test_unreachable_targets_clip_and_flag_clamps():
+    ik = BatchIK(LENGTH_A, LENGTH_B, LENGTH_C)
+    sites = np.array([[200.0, 0.0, 0.0], [0.0, 0.0, 0.0], [LENGTH_C, 0.0, 0.0], [60.0, 10.0, -40.0]])
+    out = np.empty((4, 3))
+    clamped = np.zeros((4, 3), dtype=bool)
+    angles = ik.solve_into(sites, out, clamped)
+    assert np.isfinite(angles).all()
+    assert ((angles >= SERVO_MIN) & (angles <= SERVO_MAX)).all()
+    raw = SERVO_SIGN * ik.cartesian_to_polar(sites) + SERVO_OFFSET
+    assert (clamped == ((raw < SERVO_MIN - 1e-6) | (raw > SERVO_MAX + 1e-6))).all()
+    assert clamped.any() and not clamped[3].any()
+    ik.solve_into(random_sites(4), out, clamped)
+    assert not clamped.any()
@@ -0,0 +1,48 @@
+import threading
+
+import numpy as np
+
+from leg_state import LegStateStore
+
+
+def test_begin_edits_a_copy_until_publish():
+    store = LegStateStore(np.ones((4, 3)))
+    back = store.begin()
+    back[0] = (5.0, 6.0, 7.0)
+    assert (store.front() == 1.0).all()
+    store.publish()
+    assert store.front()[0].tolist() == [5.0, 6.0, 7.0]
+    assert (store.front()[1:] == 1.0).all()
+
+
+def test_snapshot_is_a_copy():
+    store = LegStateStore(np.zeros((4, 3)))
+    snapshot = store.snapshot()
+    store.write(np.ones((4, 3)))
+    assert (snapshot == 0.0).all()
+
+
+def test_snapshots_never_mix_two_states():
+    # The writer publishes states that are uniform; a torn read would mix two values
+    store = LegStateStore()
+    stop = threading.Event()
+
+    def writer():
+        value = 0.0
+        while not stop.is_set():
+            value += 1.0
+            back = store.begin()
+            for leg in range(4):
+                back[leg] = value
+            store.publish()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        out = np.empty((4, 3))
+        for _ in range(20000):
+            store.snapshot(out)
+            assert (out == out[0, 0]).all()
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from motion import MotionCancelled
+from motion_executor import DRIVE, MotionExecutor
+
+
+class StubRobot:
+    # Just the part of RobotKinematics the executor calls
+    def __init__(self):
+        self.cancelled = False
+        self.release = threading.Event()
+
+    def cancel(self):
+        self.cancelled = True
+        self.release.set()
+
+    def resume(self):
+        self.cancelled = False
+
+    def stand(self):
+        pass
+
+    def settle(self):
+        pass
+
+
+class StubStream:
+    # Stands in for VelocityGait and BodyPoseController
+    running = False
+    stopping = False
+
+    def start(self):
+        self.running = True
+
+    def finish(self):
+        self.running = False
+
+    stop = finish
+
+    def set_command(self, *command):
+        pass
+
+    def set_pose(self, *pose):
+        pass
+
+    def restore(self):
+        pass
+
+
+@pytest.fixture
+def executor():
+    robot = StubRobot()
+    executor = MotionExecutor(robot, StubStream(), StubStream())
+    executor.ran = []
+    return executor
+
+
+def wait_idle(executor, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not executor.idle():
+        assert time.monotonic() < deadline, "executor never went idle"
+        time.sleep(0.001)
+
+
+def hold(executor):
+    # Keep the worker busy with a motion until the robot is cancelled or released
+    def blocking():
+        executor.robot.release.wait()
+        if executor.robot.cancelled:
+            raise MotionCancelled()
+
+    executor.submit("block", blocking)
+    while executor.stats()["current"] != "block":
+        time.sleep(0.001)
+
+
+def record(executor, name):
+    return lambda *args: executor.ran.append((name,) + args)
+
+
+def test_repeated_motion_is_coalesced(executor):
+    hold(executor)
+    first = executor.submit("wave", record(executor, "wave"), 3)
+    assert executor.submit("wave", record(executor, "wave"), 3) is first
+    other = executor.submit("wave", record(executor, "wave"), 4)
+    assert other is not first
+    # The running command absorbs a repeat of itself too
+    assert executor.submit("block", record(executor, "block")).name == "block"
+    executor.robot.release.set()
+    wait_idle(executor)
+    assert executor.ran == [("wave", 3), ("wave", 4)]
+    assert executor.stats()["coalesced"] == 2
+
+
+def test_newest_drive_replaces_the_queued_one(executor):
+    hold(executor)
+    executor.submit("drive", record(executor, "drive"), 1.0, priority=DRIVE)
+    newest = executor.submit("drive", record(executor, "drive"), 2.0, priority=DRIVE)
+    assert executor.stats()["queue_depth"] == 1
+    executor.robot.release.set()
+    wait_idle(executor)
+    assert executor.ran == [("drive", 2.0)]
+    assert newest.args == (2.0,)
+
+
+def test_priorities_then_submission_order(executor):
+    hold(executor)
+    executor.submit("a", record(executor, "a"))
+    executor.submit("drive", record(executor, "drive"), priority=DRIVE)
+    executor.submit("b", record(executor, "b"))
+    executor.robot.release.set()
+    wait_idle(executor)
+    assert executor.ran == [("drive",), ("a",), ("b",)]
+
+
+def test_stop_drops_the_queue_and_cancels_the_running_motion(executor):
+    hold(executor)
+    executor.submit("a", record(executor, "a"))
+    executor.stop()
+    wait_idle(executor)
+    assert executor.ran == []
+    stats = executor.stats()
+    assert stats["cancelled"] == 1
+    assert stats["completed"] == 1  # The stop itself
+    assert not executor.robot.cancelled  # run_stop resumed the robot
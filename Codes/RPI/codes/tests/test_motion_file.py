@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import motion_file
+from motion_file import ANGLE_UNIT, KEYFRAME, SITE_UNIT, MotionFile, MotionPlayer
+
+
+def motion(ticks, step=1.0, seed=0):
+    # A smooth random walk of angles and foot positions, at most `step` per tick
+    rng = np.random.default_rng(seed)
+    angles = 90.0 + np.cumsum(rng.uniform(-step, step, (ticks, 4, 3)), axis=0)
+    sites = np.cumsum(rng.uniform(-step, step, (ticks, 4, 3)), axis=0) + (62.0, 20.0, -50.0)
+    return angles, sites
+
+
+@pytest.mark.parametrize("delta", [True, False])
+def test_round_trip(tmp_path, delta):
+    angles, sites = motion(3 * KEYFRAME + 7)
+    path = str(tmp_path / "walk.lgm")
+    assert motion_file.save(path, angles, sites, 50.0, move_speed=5.0, delta=delta) == delta
+    loaded = MotionFile(path)
+    assert len(loaded) == len(angles) and loaded.rate == 50.0 and loaded.move_speed == 5.0
+    for i in range(len(angles)):
+        frame_angles, frame_sites = loaded.frame(i)
+        assert np.abs(frame_angles - angles[i]).max() <= ANGLE_UNIT / 2 + 1e-9
+        assert np.abs(frame_sites - sites[i]).max() <= SITE_UNIT / 2 + 1e-9
+    loaded.close()
+
+
+def test_fast_motions_fall_back_to_absolute(tmp_path):
+    angles, sites = motion(20, step=30.0)
+    assert not motion_file.save(str(tmp_path / "fast.lgm"), angles, sites, 50.0)
+
+
+def test_seek_matches_sequential_decoding(tmp_path):
+    angles, sites = motion(5 * KEYFRAME)
+    path = str(tmp_path / "dance.lgm")
+    motion_file.save(path, angles, sites, 50.0)
+    loaded = MotionFile(path)
+    sequential = [np.concatenate(loaded.frame(i)).copy() for i in range(len(loaded))]
+    rng = np.random.default_rng(1)
+    for i in rng.integers(0, len(loaded), 200):
+        assert (np.concatenate(loaded.frame(i)) == sequential[i]).all()
+    loaded.close()
+
+
+def test_player_seek_and_speed(tmp_path):
+    angles, sites = motion(100)
+    path = str(tmp_path / "wave.lgm")
+    motion_file.save(path, angles, sites, 50.0)
+    loaded = MotionFile(path)
+    player = MotionPlayer(loaded, 50.0, speed=2.0)
+    assert len(player) == 50
+    player.seek(40)
+    assert len(player) == 30
+    assert (player.frame(1)[0] == loaded.frame(42)[0]).all()
+    player.seek(1000)
+    assert len(player) == 1
+    loaded.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_motion.lgm"
+    path.write_bytes(b"hello")
+    with pytest.raises(ValueError):
+        MotionFile(str(path))
@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+import pytest
+
+from batch_ik import SERVO_MAX, SERVO_MIN, SERVO_OFFSET, SERVO_SIGN, leg_angles
+from reachability import ReachabilityMap, nearest_inside
+
+LENGTH_A, LENGTH_B, LENGTH_C = 55.0, 77.5, 27.5
+
+
+@pytest.fixture(scope="module")
+def reach():
+    return ReachabilityMap(LENGTH_A, LENGTH_B, LENGTH_C).build()
+
+
+def reachable(leg, site):
+    # Ground truth: the IK has an exact solution and every servo angle is in range
+    x, y, z = site
+    alpha, beta, exact = leg_angles(math.hypot(x, y) - LENGTH_C, z, LENGTH_A, LENGTH_B)
+    polar = np.degrees((alpha, beta, math.atan2(y, x)))
+    servo = SERVO_SIGN[leg] * polar + SERVO_OFFSET[leg]
+    return exact and bool(((servo >= SERVO_MIN) & (servo <= SERVO_MAX)).all())
+
+
+def random_sites(n, seed=1):
+    rng = np.random.default_rng(seed)
+    return np.stack((rng.uniform(-40.0, 170.0, n), rng.uniform(-170.0, 170.0, n), rng.uniform(-140.0, 140.0, n)),
+                    axis=-1).tolist()
+
+
+def test_standing_stance_is_reachable(reach):
+    for leg in range(4):
+        for site in ((62.0, 0.0, -50.0), (62.0, 40.0, -50.0), (62.0, 40.0, -30.0)):
+            assert reach.contains(leg, site)
+
+
+def test_contains_matches_the_exact_check(reach):
+    for leg in range(4):
+        sites = random_sites(2000, seed=leg)
+        assert [reach.contains(leg, site) for site in sites] == [reachable(leg, site) for site in sites]
+
+
+def test_project_keeps_reachable_targets(reach):
+    site = (70.0, 20.0, -45.0)
+    assert reach.project(0, site) == site
+
+
+def test_project_lands_inside_and_nearby(reach):
+    for leg in range(4):
+        for site in random_sites(300, seed=10 + leg):
+            projected = reach.project(leg, site)
+            assert reach.contains(leg, projected)
+            assert reach.project(leg, projected) == projected
+    # A target a little out of reach moves only a little
+    stretched = (LENGTH_A + LENGTH_B + LENGTH_C + 5.0, 0.0, 0.0)
+    assert math.dist(reach.project(0, stretched), stretched) < 10.0
+
+
+def test_nearest_inside_matches_brute_force():
+    rng = np.random.default_rng(0)
+    inside = rng.random((23, 31)) < 0.08
+    nearest = nearest_inside(inside)
+    cells = np.argwhere(inside)
+    for i in range(inside.shape[0]):
+        for j in range(inside.shape[1]):
+            best = ((cells - (i, j)) ** 2).sum(axis=1).min()
+            assert ((nearest[i, j] - (i, j)) ** 2).sum() == best
+            assert inside[tuple(nearest[i, j])]
@@ -0,0 +1,68 @@
+from target_tracker import TargetTracker
+
+
+class ScriptedDetector:
+    # Detector whose hits come from a script; records which searches the tracker asked for
+    def __init__(self, positions, size=40):
+        self.positions = iter(positions)
+        self.size = size
+        self.area = 0.0
+        self.searches = []
+        self.current = None
+
+    def next_frame(self):
+        self.current = next(self.positions)
+        return object()
+
+    def find(self, frame, roi=None):
+        self.searches.append("full" if roi is None else "roi")
+        position = self.current
+        if position is None or (roi is not None and not (roi[0] <= position[0] <= roi[2]
+                                                       and roi[1] <= position[1] <= roi[3])):
+            self.area = 0.0
+            return None
+        self.area = float(self.size * self.size)
+        x, y = position
+        half = self.size // 2
+        return position, (x - half, y - half, x + half, y + half)
+
+
+def run(tracker, detector, frames, fps=30.0):
+    return [tracker.update(detector.next_frame(), i / fps) for i in range(frames)]
+
+
+def test_coasts_through_a_dropout():
+    # Target moving right at 3 px per frame, missing for 3 frames
+    positions = [(100 + 3 * i, 200) if not 10 <= i < 13 else None for i in range(20)]
+    detector = ScriptedDetector(positions)
+    tracker = TargetTracker(detector)
+    estimates = run(tracker, detector, 20)
+    assert all(estimate is not None for estimate in estimates)
+    for i in range(10, 13):
+        assert abs(estimates[i][0] - (100 + 3 * i)) <= 6
+    assert tracker.stats()["coasted"] == 3
+
+
+def test_coasting_skips_the_roi_search():
+    positions = [(320, 240)] * 5 + [None] * 3 + [(320, 240)] * 2
+    detector = ScriptedDetector(positions)
+    tracker = TargetTracker(detector)
+    run(tracker, detector, len(positions))
+    # First frame full; ROI hits; the first miss tries the ROI then falls back; coasting frames go straight to full
+    assert detector.searches == ["full"] + ["roi"] * 4 + ["roi", "full"] + ["full", "full"] + ["full"] + ["roi"]
+
+
+def test_lost_after_max_coast():
+    positions = [(320, 240)] * 3 + [None] * 30
+    detector = ScriptedDetector(positions)
+    tracker = TargetTracker(detector, max_coast=0.2)
+    estimates = run(tracker, detector, len(positions))
+    assert estimates[3] is not None
+    assert estimates[-1] is None and tracker.position is None
+
+
+def test_full_search_every_full_every_frames():
+    detector = ScriptedDetector([(320, 240)] * 12)
+    tracker = TargetTracker(detector, full_every=4)
+    run(tracker, detector, 12)
+    assert detector.searches == (["full", "roi", "roi", "roi"] * 3)
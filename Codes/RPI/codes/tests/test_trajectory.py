@@ -0,0 +1,64 @@
+import math
+
+import pytest
+
+from clock import VirtualClock
+from kinematics import RobotKinematics
+from servo_backend import SimServoBackend
+from trajectory import PROFILES, Trajectory, move_duration
+
+
+@pytest.mark.parametrize("profile", sorted(PROFILES))
+def test_profile_runs_from_start_to_end(profile):
+    move = Trajectory((0.0, 0.0, -50.0), (30.0, 40.0, -30.0), 1.0, 2.0, profile)
+    assert move.position(0.5) == [0.0, 0.0, -50.0]
+    assert move.position(1.0) == [0.0, 0.0, -50.0]
+    assert move.position(3.0) == [30.0, 40.0, -30.0]
+    assert move.done(3.0) and not move.done(2.9)
+    # Monotonic along the line, and symmetric about the middle of the move
+    progress = [move.position(1.0 + 2.0 * i / 100)[0] / 30.0 for i in range(101)]
+    assert all(b >= a for a, b in zip(progress, progress[1:]))
+    assert progress[50] == pytest.approx(0.5)
+
+
+def test_smooth_profiles_start_and_end_at_rest():
+    for name in ("trapezoid", "minjerk"):
+        shape = PROFILES[name]
+        assert shape(1e-4) < 1e-3 and 1 - shape(1 - 1e-4) < 1e-3
+
+
+def test_position_writes_into_out():
+    move = Trajectory((0.0, 0.0, 0.0), (10.0, 0.0, 0.0), 0.0, 1.0, "linear")
+    out = [0.0, 0.0, 0.0]
+    assert move.position(0.25, out=out) is out
+    assert out == [2.5, 0.0, 0.0]
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        Trajectory((0.0, 0.0, 0.0), (1.0, 0.0, 0.0), 0.0, 1.0, "bogus")
+
+
+def test_move_duration():
+    assert move_duration((0, 0, 0), (3, 4, 0), 5.0) == 1.0
+    assert move_duration((1, 1, 1), (1, 1, 1), 0.0) == 0.0
+    assert math.isinf(move_duration((0, 0, 0), (1, 0, 0), 0.0))
+
+
+def test_sync_phase_finishes_legs_together():
+    clock = VirtualClock()
+    robot = RobotKinematics(backend=SimServoBackend(clock), clock=clock)
+    robot.move_speed = robot.leg_move_speed
+    robot.set_sites([(62.0, 0.0, -50.0)] * 4, duration=0)
+    robot.wait_all_reach()
+    # Leg 0 moves 40 mm, leg 1 only 5 mm; set before one wait, they form one phase
+    speed = robot.move_speed * robot.base_rate
+    robot.set_site(0, 62.0, 40.0, -50.0)
+    robot.set_site(1, 62.0, 5.0, -50.0)
+    assert robot.trajectory[0].end_time == robot.trajectory[1].end_time
+    assert robot.trajectory[1].duration > move_duration((62, 0, -50), (62, 5, -50), speed)
+    robot.wait_all_reach()
+    # After the wait a new phase starts, so the next move isn't stretched to match
+    robot.set_site(2, 62.0, 5.0, -50.0)
+    assert robot.trajectory[2].duration == pytest.approx(move_duration((62, 0, -50), (62, 5, -50), speed))
+    robot.wait_all_reach()
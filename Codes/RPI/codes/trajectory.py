@@ -0,0 +1,79 @@
+import math
+
+
+def linear(s):
+    return s
+
+
+def trapezoid(s, ramp=0.25):
+    # Constant acceleration for the first and last `ramp` of the move, cruise in between
+    peak = 1.0 / (1.0 - ramp)
+    if s < ramp:
+        return peak * s * s / (2 * ramp)
+    if s > 1.0 - ramp:
+        r = 1.0 - s
+        return 1.0 - peak * r * r / (2 * ramp)
+    return peak * (s - ramp / 2)
+
+
+def minimum_jerk(s):
+    # Zero velocity and acceleration at both ends
+    return s * s * s * (10.0 - 15.0 * s + 6.0 * s * s)
+
+
+PROFILES = {
+    "linear": linear,
+    "trapezoid": trapezoid,
+    "minjerk": minimum_jerk,
+}
+
+
+class Trajectory:
+    """Straight-line foot move from `start` to `end` over `duration` seconds.
+
+    The position is a function of time only, so it doesn't depend on the
+    control rate and the reach time is known when the move is planned.
+    """
+
+    def __init__(self, start, end, start_time, duration, profile="trapezoid"):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown motion profile: {profile}")
+        self.start = tuple(start)
+        self.end = tuple(end)
+        self.start_time = start_time
+        self.duration = duration
+        self.profile = profile
+        self.shape = PROFILES[profile]
+
+    @property
+    def end_time(self):
+        return self.start_time + self.duration
+
+    def done(self, t):
+        return t >= self.end_time
+
+    def position(self, t, out=None):
+        # Position at time t, written into `out` (any 3-element mutable sequence) if given
+        if out is None:
+            out = [0.0, 0.0, 0.0]
+        if self.duration <= 0 or t >= self.end_time:
+            out[:] = self.end
+            return out
+        s = self.shape(max(t - self.start_time, 0.0) / self.duration)
+        for i in range(3):
+            out[i] = self.start[i] + (self.end[i] - self.start[i]) * s
+        return out
+
+    def retime(self, duration):
+        # Stretch to a new duration, keeping the start time
+        self.duration = duration
+
+
+def move_duration(start, end, speed):
+    # Seconds to cover start -> end at an average of `speed` mm/s
+    distance = math.dist(start, end)
+    if distance == 0:
+        return 0.0
+    if speed <= 0:
+        return math.inf
+    return distance / speed
@@ -0,0 +1,108 @@
+import math
+import sys
+import time
+
+from color_detector import ColorDetector
+from frame_sources import ImageDirSource, SyntheticBlobSource, VideoFileSource
+from kinematics import RobotKinematics
+from object_detection import ObjectTracker
+from servo_backend import SimServoBackend
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def sim_robot():
+    # Standing robot on a simulated board in real time, so the gait runs alongside detection
+    robot = RobotKinematics(backend=SimServoBackend())
+    robot.setup()
+    robot.stand()
+    return robot
+
+
+def accuracy(log, truth, hit_radius=20.0):
+    """Compare logged positions with the source's ground truth (one entry per frame read).
+
+    `reported_hidden` counts positions given while the target was out of
+    view; the tracker coasting through a short dropout counts there too.
+    """
+    errors = []
+    missed = reported_hidden = 0
+    visible = 0
+    for seq, _, _, _, position in log:
+        expected = truth[seq - 1] if seq <= len(truth) else None
+        if expected is None:
+            reported_hidden += position is not None
+            continue
+        visible += 1
+        if position is None:
+            missed += 1
+        else:
+            errors.append(math.dist(position, expected))
+    return {
+        "detection_rate": (visible - missed) / visible if visible else None,
+        "reported_hidden": reported_hidden,
+        "error_mean_px": sum(errors) / len(errors) if errors else None,
+        "error_p95_px": percentile(errors, 0.95),
+        "within_radius": sum(error <= hit_radius for error in errors) / visible if visible else None,
+    }
+
+
+def run(source, workers=0, level=1, robot=None, detector=None):
+    """Track `source` headless to the end and return FPS, latency and accuracy figures.
+
+    Latencies are per processed frame in milliseconds: `detect` is the
+    detection itself (including the queue wait with worker processes),
+    `command` runs from capture until the servo has retargeted the gait.
+    Accuracy needs a source that knows its ground truth, like
+    SyntheticBlobSource.
+    """
+    if robot is None:
+        robot = sim_robot()
+    if detector is None:
+        detector = ColorDetector(lower=(0, 100, 100), upper=(10, 255, 255), level=level)
+    tracker = ObjectTracker(robot, source, detector=detector, workers=workers, headless=True)
+    tracker.log = []
+    tracker.report = lambda: None  # Keep the once-a-second report out of the results
+    start = time.monotonic()
+    tracker.track_object()
+    elapsed = time.monotonic() - start
+    tracker.executor.stop()
+
+    log = tracker.log
+    detect = [entry[2] * 1000 for entry in log]
+    command = [(entry[3] - entry[1]) * 1000 for entry in log]
+    results = {
+        "frames_read": source.index,
+        "frames_processed": len(log),
+        "capture_fps": source.index / elapsed,
+        "detect_fps": len(log) / elapsed,
+        "detect_p50_ms": percentile(detect, 0.5),
+        "detect_p99_ms": percentile(detect, 0.99),
+        "command_p50_ms": percentile(command, 0.5),
+        "command_p99_ms": percentile(command, 0.99),
+    }
+    if source.truth:
+        results.update(accuracy(log, source.truth))
+    return results
+
+
+if __name__ == "__main__":
+    # vision_harness.py synthetic | video PATH | images DIR   [--workers N] [--level N]
+    argv = sys.argv[1:]
+    workers = int(argv[argv.index("--workers") + 1]) if "--workers" in argv else 0
+    level = int(argv[argv.index("--level") + 1]) if "--level" in argv else 1
+    if argv and argv[0] == "video" and len(argv) > 1:
+        source = VideoFileSource(argv[1])
+    elif argv and argv[0] == "images" and len(argv) > 1:
+        source = ImageDirSource(argv[1])
+    elif not argv or argv[0] == "synthetic" or argv[0].startswith("--"):
+        source = SyntheticBlobSource()
+    else:
+        sys.exit("usage: vision_harness.py synthetic | video PATH | images DIR [--workers N] [--level N]")
+    for name, value in run(source, workers, level).items():
+        print(f"  {name:<18} {value:.3f}" if isinstance(value, float) else f"  {name:<18} {value}")
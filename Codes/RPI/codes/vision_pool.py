@@ -0,0 +1,134 @@
+import heapq
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from color_detector import ColorDetector
+
+# Per-process state of a pool worker, set up once by init_worker
+worker_ring = None
+worker_frames = None
+worker_detector = None
+
+
+def init_worker(name, slots, shape, detector_args):
+    global worker_ring, worker_frames, worker_detector
+    worker_ring = shared_memory.SharedMemory(name=name)
+    worker_frames = np.ndarray((slots, *shape), dtype=np.uint8, buffer=worker_ring.buf)
+    worker_detector = ColorDetector(**detector_args)
+
+
+def detect_slot(slot):
+    # Runs in a worker: (position, area) of the target in the frame in `slot`, straight out of shared memory
+    position = worker_detector.detect(worker_frames[slot])
+    return position, worker_detector.area
+
+
+class SharedFrameRing:
+    """Fixed slots of uint8 frames in one shared-memory block.
+
+    The capture side copies each frame into a free slot once; workers map
+    the same block, so only the slot number crosses the process boundary.
+    A slot stays taken until its result is back.
+    """
+
+    def __init__(self, slots, shape):
+        self.slots = slots
+        self.shape = tuple(shape)
+        size = slots * int(np.prod(self.shape))
+        self.memory = shared_memory.SharedMemory(create=True, size=size)
+        self.frames = np.ndarray((slots, *self.shape), dtype=np.uint8, buffer=self.memory.buf)
+        self.free = list(range(slots))
+
+    def put(self, frame):
+        # Copy into a free slot and return its index, or None if every slot is in use
+        if not self.free:
+            return None
+        slot = self.free.pop()
+        np.copyto(self.frames[slot], frame)
+        return slot
+
+    def release(self, slot):
+        self.free.append(slot)
+
+    def close(self):
+        del self.frames  # Drop the view before the buffer goes away
+        self.memory.close()
+        self.memory.unlink()
+
+
+class ParallelDetector:
+    """ColorDetector fanned out over a process pool.
+
+    submit() hands a frame to the next idle worker, or drops it when all of
+    them are busy, which keeps the newest-frame behaviour of the capture
+    stage. results() returns finished detections strictly in submission
+    order, holding back any that overtook an earlier frame. Workers see
+    frames out of order, so each one does a full-frame search; ROI tracking
+    needs the serial detector. Workers are spawned, not forked, so the
+    servo thread and its locks stay in the main process only.
+    """
+
+    def __init__(self, workers=None, slots=None, **detector_args):
+        self.workers = workers or os.cpu_count() or 1
+        self.slots = slots or 2 * self.workers
+        self.detector_args = dict(detector_args, use_roi=False)
+        self.ring = None
+        self.pool = None
+        self.pending = {}  # seq -> (future, slot, item)
+        self.done = []  # Heap of (seq, result, item) that came back early
+        self.next_seq = 0  # Next sequence number to hand out
+        self.next_result = 0  # Next sequence number results() may return
+        self.dropped = 0
+
+    def start(self, shape):
+        self.ring = SharedFrameRing(self.slots, shape)
+        context = multiprocessing.get_context("spawn")
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=context, initializer=init_worker,
+                                        initargs=(self.ring.memory.name, self.slots, self.ring.shape,
+                                                  self.detector_args))
+
+    def submit(self, frame, item=None):
+        # Queue `frame` for detection; `item` comes back with its result. False if it was dropped.
+        if self.pool is None:
+            self.start(frame.shape)
+        if len(self.pending) >= self.workers:
+            self.dropped += 1
+            return False
+        slot = self.ring.put(frame)
+        if slot is None:
+            self.dropped += 1
+            return False
+        seq = self.next_seq
+        self.next_seq += 1
+        self.pending[seq] = (self.pool.submit(detect_slot, slot), slot, item)
+        return True
+
+    def collect(self, wait=False):
+        # Move finished detections from `pending` to the reorder heap
+        for seq, (future, slot, item) in list(self.pending.items()):
+            if not (wait and seq == self.next_result) and not future.done():
+                continue
+            result = future.result()
+            self.ring.release(slot)
+            del self.pending[seq]
+            heapq.heappush(self.done, (seq, result, item))
+
+    def results(self, wait=False):
+        # In-order list of ((position, area), item); with wait=True blocks for the oldest outstanding frame
+        self.collect(wait and self.next_result in self.pending)
+        ordered = []
+        while self.done and self.done[0][0] == self.next_result:
+            _, result, item = heapq.heappop(self.done)
+            ordered.append((result, item))
+            self.next_result += 1
+        return ordered
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.ring.close()
+            self.pool = self.ring = None
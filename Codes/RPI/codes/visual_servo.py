@@ -0,0 +1,113 @@
+import math
+
+
+class PID:
+    """PID controller with an error deadband, output limit and output rate limit.
+
+    Errors inside the deadband count as zero, so a centered target doesn't
+    keep the robot twitching. The integral stops growing while the output is
+    saturated.
+    """
+
+    def __init__(self, kp, ki=0.0, kd=0.0, limit=math.inf, rate_limit=math.inf, deadband=0.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.limit = limit
+        self.rate_limit = rate_limit  # Max output change per second
+        self.deadband = deadband
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.last_error = None
+        self.output = 0.0
+
+    def slew(self, target, dt):
+        # Move the output towards `target`, no faster than `rate_limit`
+        step = self.rate_limit * dt
+        self.output += min(max(target - self.output, -step), step)
+        return self.output
+
+    def update(self, error, dt):
+        if abs(error) <= self.deadband:
+            error = 0.0
+        derivative = 0.0 if self.last_error is None or dt <= 0 else (error - self.last_error) / dt
+        self.last_error = error
+        integral = self.integral + error * dt
+        target = self.kp * error + self.ki * integral + self.kd * derivative
+        if abs(target) < self.limit:
+            self.integral = integral
+        target = min(max(target, -self.limit), self.limit)
+        return self.slew(target, dt)
+
+    def decay(self, dt):
+        # Wind the output down to zero at the rate limit, e.g. while the target is out of sight
+        self.integral = 0.0
+        self.last_error = None
+        return self.slew(0.0, dt)
+
+
+class VisualServo:
+    """Turns a tracked target into continuous gait setpoints.
+
+    The horizontal offset drives a quick sideways body shift and a slower
+    yaw rate; the apparent size drives forward speed, using the square root
+    of the area so the error is roughly proportional to distance. Errors are
+    normalized (offset in half-frame widths, size as a fraction of the
+    frame), so the gains don't depend on the camera resolution. Each update
+    only retargets the running VelocityGait through the executor, so it can
+    be called at frame rate from the detection loop.
+    """
+
+    def __init__(self, gait, executor, target_area=0.04, lost_timeout=1.0,
+                 shift=None, yaw=None, forward=None):
+        self.gait = gait
+        self.executor = executor
+        self.target_size = math.sqrt(target_area)  # Fraction of the frame the target should fill
+        self.lost_timeout = lost_timeout  # Seconds without the target before standing still
+        # Lean towards small offsets at once (mm), turn towards lasting ones (rad/s), walk to close the distance (mm/s)
+        self.shift = shift if shift is not None else PID(15.0, limit=15.0, rate_limit=60.0, deadband=0.05)
+        self.yaw = yaw if yaw is not None else PID(-0.6, ki=-0.2, kd=-0.02, limit=0.4, rate_limit=1.0,
+                                                   deadband=0.1)
+        self.forward = forward if forward is not None else PID(300.0, ki=20.0, limit=40.0, rate_limit=80.0,
+                                                               deadband=0.02)
+        self.last_time = None
+        self.last_seen = None
+        self.active = False
+
+    def update(self, position, area, frame_size, now):
+        """Feed one detection (`position` None if the target wasn't found) taken at time `now`."""
+        dt = 0.0 if self.last_time is None else max(now - self.last_time, 0.0)
+        self.last_time = now
+
+        if position is None:
+            if self.active and now - self.last_seen > self.lost_timeout:
+                self.release()
+                return
+            shift, yaw, forward = self.shift.decay(dt), self.yaw.decay(dt), self.forward.decay(dt)
+        else:
+            self.last_seen = now
+            width, height = frame_size
+            offset = (position[0] - width / 2) / (width / 2)
+            size = math.sqrt(area / (width * height))
+            shift = self.shift.update(offset, dt)
+            yaw = self.yaw.update(offset, dt)
+            forward = self.forward.update(self.target_size - size, dt)
+
+        if position is None and not self.active:
+            return
+        self.active = True
+        self.gait.set_shift(shift, 0.0)
+        self.executor.drive(0.0, forward, yaw)
+
+    def release(self):
+        # Target gone: stand still and start over on the next sighting
+        for pid in (self.shift, self.yaw, self.forward):
+            pid.reset()
+        self.gait.set_shift(0.0, 0.0)
+        self.executor.stop()
+        self.active = False
+
+    def setpoints(self):
+        return {"shift_mm": self.shift.output, "yaw_rate": self.yaw.output, "vy": self.forward.output}
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import math
+import os
+import time
+
+from aiohttp import WSMsgType, web
+
+from control_loop import TickHistogram
+from server import dispatch, executor, robot
+from telemetry import prometheus
+
+POSE_RATE = 20.0  # Hz, pose updates pushed to every connected client
+POSE_FIELDS = ("roll", "pitch", "yaw", "x", "y", "z")  # Body pose message, radians and mm
+INDEX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "index.html")
+
+clients = set()
+latency = TickHistogram(bin_width=0.0001, bins=500)  # Message received -> handed to the executor
+
+
+def number(data, name):
+    # Finite float field of a message; json.loads accepts NaN and Infinity, the executor must never see them
+    value = float(data.get(name, 0.0))
+    if not math.isfinite(value):
+        raise ValueError(f"{name} is not finite")
+    return value
+
+
+class Client:
+    """One WebSocket connection; only its newest velocity command is kept."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.velocity = None  # (vx, vy, yaw_rate, seq, received)
+        self.coalesced = 0
+        self.pending = asyncio.Event()
+
+    async def send(self, message):
+        try:
+            await self.ws.send_str(json.dumps(message))
+        except ConnectionError:
+            pass
+
+    async def apply_velocity(self):
+        # Drain the newest velocity command whenever one arrives; older ones are dropped
+        while True:
+            await self.pending.wait()
+            self.pending.clear()
+            vx, vy, yaw_rate, seq, received = self.velocity
+            executor.drive(vx, vy, yaw_rate)
+            await self.ack(seq, received, coalesced=self.coalesced)
+            self.coalesced = 0
+
+    async def ack(self, seq, received, **extra):
+        elapsed = time.monotonic() - received
+        latency.add(elapsed)
+        await self.send({"type": "ack", "seq": seq, "latency_ms": elapsed * 1000, **extra})
+
+    async def handle(self, data):
+        received = time.monotonic()
+        seq = data.get("seq")
+        if data.get("type") == "velocity":
+            if self.pending.is_set():
+                self.coalesced += 1
+            self.velocity = (number(data, "vx"), number(data, "vy"), number(data, "yaw_rate"), seq, received)
+            self.pending.set()
+        elif data.get("type") == "pose":
+            # Body pose stream; the executor keeps only the newest queued pose
+            executor.pose(*(number(data, name) for name in POSE_FIELDS))
+            await self.ack(seq, received)
+        elif dispatch(data.get("action", "")):
+            await self.ack(seq, received, action=data["action"])
+        else:
+            await self.send({"type": "error", "seq": seq, "error": "unknown command"})
+
+
+async def websocket(request):
+    ws = web.WebSocketResponse(heartbeat=10.0)
+    await ws.prepare(request)
+    client = Client(ws)
+    clients.add(client)
+    applier = asyncio.create_task(client.apply_velocity())
+    try:
+        async for msg in ws:
+            if msg.type == WSMsgType.TEXT:
+                try:
+                    data = json.loads(msg.data)
+                    if not isinstance(data, dict):
+                        raise TypeError("message is not an object")
+                    await client.handle(data)
+                except (ValueError, TypeError):
+                    await client.send({"type": "error", "error": "bad message"})
+    finally:
+        applier.cancel()
+        clients.discard(client)
+    return ws
+
+
+async def broadcast_pose(app):
+    # Push the current foot positions and executor state to every client
+    period = 1.0 / POSE_RATE
+    while True:
+        await asyncio.sleep(period)
+        if not clients:
+            continue
+        stats = executor.stats()
+        message = {
+            "type": "pose",
+            "t": time.monotonic(),
+            "sites": robot.now.snapshot().tolist(),
+            "current": stats["current"],
+            "queue_depth": stats["queue_depth"],
+        }
+        await asyncio.gather(*(client.send(message) for client in list(clients)))
+
+
+async def start_background(app):
+    app["pose_task"] = asyncio.create_task(broadcast_pose(app))
+
+
+async def stop_background(app):
+    app["pose_task"].cancel()
+
+
+async def home(request):
+    return web.FileResponse(INDEX)
+
+
+async def command(request):
+    # Same contract as the Flask route, for clients without WebSocket
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    action = data.get("action", "") if isinstance(data, dict) else ""
+    if not isinstance(action, str) or not action:
+        return web.json_response({"status": "error"}, status=400)
+    if not dispatch(action):
+        return web.json_response({"status": "error", "error": "unknown command"}, status=400)
+    return web.json_response({"status": "success", "queue_depth": executor.stats()["queue_depth"]})
+
+
+async def stats(request):
+    return web.json_response({"executor": executor.stats(), "ws_latency": latency.summary(), "clients": len(clients)})
+
+
+async def metrics(request):
+    return web.Response(text=prometheus(robot.telemetry, robot.loop), content_type="text/plain")
+
+
+async def telemetry_dump(request):
+    return web.Response(body=robot.telemetry.to_bytes(), content_type="application/octet-stream")
+
+
+def make_app():
+    app = web.Application()
+    app.router.add_get("/", home)
+    app.router.add_post("/command", command)
+    app.router.add_get("/executor", stats)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/telemetry.bin", telemetry_dump)
+    app.router.add_get("/ws", websocket)
+    app.on_startup.append(start_background)
+    app.on_cleanup.append(stop_background)
+    return app
+
+
+if __name__ == "__main__":
+    executor.submit("setup", lambda: (robot.setup(), robot.stand()))
+    web.run_app(make_app(), host="0.0.0.0", port=5000)